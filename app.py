@@ -1,1011 +1,3983 @@
-from flask import Flask, render_template, request, redirect, url_for, send_file
-import psycopg2
-from datetime import datetime, timedelta, date
-import pandas as pd
-import io
-from flask import session
-from collections import defaultdict
-import os
-
-
-
-
-
-app = Flask(__name__)
-app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-key")
-# 🔌 Supabase PostgreSQL Connection
-def get_db_connection():
-    return psycopg2.connect(
-        os.environ["DATABASE_URL"],
-        sslmode="require"
-    )
-
-
-
-# 🔁 Helper: generate week → day → date mapping
-def generate_week_dates(start_date, total_weeks=20):
-    days = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday"]
-    week_map = {}
-    for w in range(1, total_weeks + 1):
-        week_start = start_date + timedelta(weeks=w - 1)
-        week_map[w] = {
-            d: (week_start + timedelta(days=i)).strftime("%d/%m/%Y")
-            for i, d in enumerate(days)
-        }
-    return week_map
-
-
-# ================= HOME =================
-@app.route('/')
-def index():
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-
-    # ✅ include role
-    cur.execute("""
-        SELECT faculty_id, name, role
-        FROM faculty
-        ORDER BY name
-    """)
-    faculty = cur.fetchall()
-
-    cur.execute("""
-        SELECT section_id, section_name
-        FROM sections
-        ORDER BY section_name
-    """)
-    sections = cur.fetchall()
-
-    return render_template(
-        "index.html",
-        faculty=faculty,
-        sections=sections
-    )
-
-
-
-# ================= FACULTY FLOW =================
-@app.route('/faculty-login', methods=['POST'])
-def faculty_login():
-    login_type = request.form['login_type']   # faculty | admin
-    faculty_id = int(request.form['faculty_id'])
-    password = request.form['password']
-    section_id = request.form['section_id']
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    # 🔐 Authenticate using plain password (TESTING ONLY)
-    cur.execute("""
-        SELECT faculty_id, role
-        FROM faculty
-        WHERE faculty_id = %s
-          AND password = %s
-    """, (faculty_id, password))
-
-    row = cur.fetchone()
-
-    if not row:
-        return "Invalid credentials", 403
-
-    logged_in_id, role = row
-
-    # 🚫 Role misuse protection
-    if login_type == 'faculty' and role != 'faculty':
-        return "Use HOD/AHOD login", 403
-
-    if login_type == 'admin' and role not in ('hod', 'ahod'):
-        return "Unauthorized admin access", 403
-
-    # 🔐 Create session
-    session.clear()
-    session['faculty_id'] = logged_in_id
-    session['role'] = role
-    session['section_id'] = section_id
-
-    # 🔎 Check if faculty actually teaches this section
-    cur.execute("""
-    SELECT 1
-    FROM class_schedule
-    WHERE faculty_id=%s AND section_id=%s
-""", (logged_in_id, section_id))
-
-    teaches = cur.fetchone()
-
-    if role == 'faculty' and not teaches:
-      cur.close()
-      conn.close()
-      return "You are not assigned to this section.", 403
-
-    # 🔀 Redirect properly
-    if role in ('hod','ahod'):
-      return redirect(url_for('admin_dashboard'))
-    else:
-      return redirect(url_for('faculty_dashboard'))
-
-
-
-@app.route('/admin-dashboard')
-def admin_dashboard():
-    if 'faculty_id' not in session or session['role'] not in ('hod','ahod'):
-        return "Access Denied", 403
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("SELECT name FROM faculty WHERE faculty_id=%s",
-                (session['faculty_id'],))
-    admin_name = cur.fetchone()[0]
-
-    cur.execute("SELECT section_name FROM sections WHERE section_id=%s",
-                (session['section_id'],))
-    section_name = cur.fetchone()[0]
-
-    return render_template(
-        "admin_dashboard.html",
-        admin_name=admin_name,
-        faculty_id=session['faculty_id'],
-        section_id=session['section_id'],
-        section_name=section_name
-    )
-@app.route('/faculty-audit')
-def faculty_audit():
-    # 🔐 Access Control
-    if 'faculty_id' not in session or session['role'] not in ('hod', 'ahod'):
-        return "Access Denied", 403
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    selected_date = request.args.get('date')
-    rows = []
-    no_class = False
-
-    if selected_date:
-        report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
-
-        # 🔎 Check if ANY class scheduled that day
-        cur.execute("""
-            SELECT COUNT(*)
-            FROM class_schedule
-            WHERE day_of_week = %s
-        """, (report_date.strftime("%A"),))
-
-        class_count = cur.fetchone()[0]
-
-        if class_count == 0:
-            no_class = True
-        else:
-            # 🔍 Fetch audit records for selected date
-            cur.execute("""
-                SELECT
-                    a.date,
-                    f_marker.name AS marked_by,
-                    f_marker.role AS marker_role,
-                    f_class.name  AS class_faculty,
-                    s.section_name
-                FROM attendance a
-                JOIN faculty f_marker 
-                    ON f_marker.faculty_id = a.marked_by
-                JOIN faculty f_class  
-                    ON f_class.faculty_id = a.faculty_id
-                JOIN sections s       
-                    ON s.section_id = a.section_id
-                WHERE a.date = %s
-                GROUP BY a.date, f_marker.name, f_marker.role, 
-                         f_class.name, s.section_name
-                ORDER BY f_class.name
-            """, (report_date,))
-
-            rows = cur.fetchall()
-
-    else:
-        # 🔍 Default → Show latest records
-        cur.execute("""
-            SELECT
-                a.date,
-                f_marker.name AS marked_by,
-                f_marker.role AS marker_role,
-                f_class.name  AS class_faculty,
-                s.section_name
-            FROM attendance a
-            JOIN faculty f_marker 
-                ON f_marker.faculty_id = a.marked_by
-            JOIN faculty f_class  
-                ON f_class.faculty_id = a.faculty_id
-            JOIN sections s       
-                ON s.section_id = a.section_id
-            GROUP BY a.date, f_marker.name, f_marker.role, 
-                     f_class.name, s.section_name
-            ORDER BY a.date DESC
-            LIMIT 50
-        """)
-
-        rows = cur.fetchall()
-
-    cur.close()
-    conn.close()
-
-    return render_template(
-        "faculty_audit.html",
-        rows=rows,
-        selected_date=selected_date,
-        no_class=no_class
-    )
-
-@app.route('/admin-attendance', methods=['GET'])
-def admin_attendance():
-    if 'faculty_id' not in session or session['role'] not in ('hod','ahod'):
-        return "Access Denied", 403
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    selected_faculty = request.args.get('faculty_id', type=int)
-    selected_subject = request.args.get('subject')
-    selected_date = request.args.get('date')
-
-    # Load faculty dropdown
-    cur.execute("""
-        SELECT faculty_id, name
-        FROM faculty
-        WHERE role='faculty'
-        ORDER BY name
-    """)
-    faculty_list = cur.fetchall()
-
-    subjects = []
-    report = []
-    present_count = absent_count = None
-    no_class = False
-    not_marked = False
-
-    if selected_faculty:
-        cur.execute("""
-            SELECT DISTINCT subject
-            FROM class_schedule
-            WHERE faculty_id=%s
-            ORDER BY subject
-        """, (selected_faculty,))
-        subjects = [r[0] for r in cur.fetchall()]
-
-    if selected_faculty and selected_subject and selected_date:
-
-        report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
-        day_name = report_date.strftime("%A")  # Monday, Tuesday etc
-
-        # 🔍 Check if class scheduled that day
-        cur.execute("""
-            SELECT 1
-            FROM class_schedule
-            WHERE faculty_id=%s
-              AND subject=%s
-              AND day_of_week=%s
-            LIMIT 1
-        """, (selected_faculty, selected_subject, day_name))
-
-        class_exists = cur.fetchone()
-
-        if not class_exists:
-            no_class = True
-        else:
-            # 🔍 Fetch attendance
-            cur.execute("""
-                SELECT s.roll_no, a.status
-                FROM attendance a
-                JOIN students s ON s.student_id = a.student_id
-                WHERE a.faculty_id=%s
-                  AND a.date=%s
-                ORDER BY s.roll_no
-            """, (selected_faculty, report_date))
-
-            rows = cur.fetchall()
-
-            if not rows:
-                not_marked = True
-            else:
-                report = [{"roll": r[0], "status": r[1]} for r in rows]
-
-                cur.execute("""
-                    SELECT
-                        COUNT(*) FILTER (WHERE status='Present'),
-                        COUNT(*) FILTER (WHERE status='Absent')
-                    FROM attendance
-                    WHERE faculty_id=%s
-                      AND date=%s
-                """, (selected_faculty, report_date))
-
-                present_count, absent_count = cur.fetchone()
-
-    cur.close()
-    conn.close()
-
-    return render_template(
-        "admin_readonly.html",
-        faculty_list=faculty_list,
-        subjects=subjects,
-        report=report,
-        selected_faculty=selected_faculty,
-        selected_subject=selected_subject,
-        selected_date=selected_date,
-        present_count=present_count,
-        absent_count=absent_count,
-        no_class=no_class,
-        not_marked=not_marked
-    )
-
-
-
-
-@app.route('/select', methods=['POST'])
-def select():
-    faculty_id = request.form['faculty_id']
-    section_id = request.form['section_id']
-    return redirect(url_for('attendance', faculty_id=faculty_id, section_id=section_id))
-
-
-@app.route('/attendance/<int:schedule_id>')
-def attendance(schedule_id):
-
-    if 'faculty_id' not in session:
-        return redirect(url_for('index'))
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    # 🔍 Get schedule details
-    cur.execute("""
-        SELECT faculty_id, section_id, subject, group_id
-        FROM class_schedule
-        WHERE schedule_id = %s
-    """, (schedule_id,))
-
-    schedule = cur.fetchone()
-
-    if not schedule:
-        return "Invalid Schedule", 404
-
-    faculty_id, section_id, subject, group_id = schedule
-
-    # 🔐 Restrict normal faculty
-    if session['role'] == 'faculty':
-        if faculty_id != session['faculty_id']:
-            return "Access Denied", 403
-
-    # 📚 Load correct students
-    if group_id:
-        cur.execute("""
-            SELECT student_id, roll_no, name
-            FROM students
-            WHERE section_id=%s AND group_id=%s
-            ORDER BY roll_no
-        """, (section_id, group_id))
-    else:
-        cur.execute("""
-            SELECT student_id, roll_no, name
-            FROM students
-            WHERE section_id=%s
-            ORDER BY roll_no
-        """, (section_id,))
-
-    students = cur.fetchall()
-
-    # 📅 Get class days
-    cur.execute("""
-        SELECT DISTINCT day_of_week
-        FROM class_schedule
-        WHERE schedule_id=%s
-    """, (schedule_id,))
-    class_days = [r[0] for r in cur.fetchall()]
-
-    semester_start = date(2026, 1, 19)
-    week_dates = generate_week_dates(semester_start)
-
-    cur.close()
-    conn.close()
-
-    return render_template(
-        "attendance.html",
-        students=students,
-        faculty_id=faculty_id,
-        section_id=section_id,
-        schedule_id=schedule_id,
-        subject=subject,
-        class_days=class_days,
-        week_dates=week_dates
-    )
-
-
-# ================= WEEK REPORT ================= 
-@app.route('/week-report')
-def week_report():
-
-    if 'faculty_id' not in session:
-        return redirect(url_for('index'))
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    selected_date = request.args.get('date')
-    schedule_id = request.args.get('schedule_id', type=int)
-    status_filter = request.args.get('filter', 'Absent')   # Default = Absent
-
-    if not selected_date or not schedule_id:
-        return render_template(
-            "week_report.html",
-            report=None,
-            schedule_id=schedule_id,
-            selected_date=selected_date,
-            filter=status_filter
-        )
-
-    report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
-
-    # 🔎 Get schedule info
-    cur.execute("""
-        SELECT faculty_id, subject
-        FROM class_schedule
-        WHERE schedule_id = %s
-    """, (schedule_id,))
-    schedule = cur.fetchone()
-
-    if not schedule:
-        return "Invalid schedule", 404
-
-    faculty_id, subject = schedule
-
-    # 🔐 Restrict normal faculty
-    if session['role'] == 'faculty':
-        if faculty_id != session['faculty_id']:
-            return "Access Denied", 403
-
-    # 🔎 Build dynamic query
-    query = """
-        SELECT s.roll_no, s.name, a.status
-        FROM attendance a
-        JOIN students s ON s.student_id = a.student_id
-        WHERE a.date = %s
-          AND a.schedule_id = %s
-    """
-    params = [report_date, schedule_id]
-
-    if status_filter != "All":
-        query += " AND a.status = %s"
-        params.append(status_filter)
-
-    query += " ORDER BY s.roll_no"
-
-    cur.execute(query, tuple(params))
-    rows = cur.fetchall()
-
-    report = [
-        {"roll": r[0], "name": r[1], "status": r[2]}
-        for r in rows
-    ]
-
-    # 📊 Correct counts (not filtered)
-    cur.execute("""
-        SELECT
-            COUNT(*) FILTER (WHERE status='Present'),
-            COUNT(*) FILTER (WHERE status='Absent')
-        FROM attendance
-        WHERE date = %s
-          AND schedule_id = %s
-    """, (report_date, schedule_id))
-
-    present_count, absent_count = cur.fetchone()
-
-    cur.close()
-    conn.close()
-
-    return render_template(
-        "week_report.html",
-        report=report,
-        selected_date=selected_date,
-        present_count=present_count,
-        absent_count=absent_count,
-        subject=subject,
-        schedule_id=schedule_id,
-        filter=status_filter
-    )
-
-# ================= STUDENT REPORT =================
-@app.route('/student-report')
-def student_report():
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("SELECT section_id, section_name FROM sections")
-    sections = cur.fetchall()
-    cur.close()
-    conn.close()
-    return render_template("student_report.html", sections=sections)
-
-
-@app.route('/get-students/<int:section_id>')
-def get_students(section_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT student_id, roll_no, name
-        FROM students
-        WHERE section_id=%s
-        ORDER BY roll_no
-    """, (section_id,))
-    students = cur.fetchall()
-
-    return {
-        "students": [
-            {"id": s[0], "roll": s[1], "name": s[2]}
-            for s in students
-        ]
-    }
-
-
-@app.route('/get-subjects')
-def get_subjects():
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("SELECT DISTINCT subject FROM class_schedule ORDER BY subject")
-    return {"subjects": [r[0] for r in cur.fetchall()]}
-
-@app.route('/get-student-attendance/<int:student_id>')
-def get_student_attendance(student_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    selected_date = request.args.get('date')
-
-    if not selected_date:
-        return {"attendance": []}
-
-    report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
-
-    query = """
-        SELECT 
-            cs.period_no,
-            cs.subject,
-            f.name AS faculty_name,
-            a.status
-        FROM attendance a
-        JOIN class_schedule cs
-          ON cs.section_id = a.section_id
-         AND cs.faculty_id = a.faculty_id
-         AND cs.day_of_week = TO_CHAR(a.date, 'FMDay')
-        JOIN faculty f
-          ON f.faculty_id = cs.faculty_id
-        WHERE a.student_id = %s
-          AND a.date = %s
-        ORDER BY cs.period_no
-    """
-
-    cur.execute(query, (student_id, report_date))
-    rows = cur.fetchall()
-
-    cur.close()
-    conn.close()
-
-    return {
-        "attendance": [
-            {
-                "period": r[0],
-                "subject": r[1],
-                "faculty": r[2],
-                "status": r[3]
-            }
-            for r in rows
-        ]
-    }
-
-
-
-# ================= EXPORT =================
-@app.route('/download-excel')
-def download_excel():
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    selected_date = request.args.get('date')
-    class_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
-
-    cur.execute("""
-        SELECT s.roll_no, s.name, a.status
-        FROM attendance a
-        JOIN students s ON s.student_id=a.student_id
-        WHERE a.date=%s
-        ORDER BY s.roll_no
-    """, (class_date,))
-    rows = cur.fetchall()
-
-    df = pd.DataFrame(rows, columns=["Roll No", "Name", "Status"])
-    output = io.BytesIO()
-    df.to_excel(output, index=False)
-    output.seek(0)
-
-    return send_file(
-        output,
-        as_attachment=True,
-        download_name=f"Attendance_{selected_date}.xlsx",
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-@app.route('/download-faculty-report')
-def download_faculty_report():
-    if 'faculty_id' not in session or session['role'] not in ('hod','ahod'):
-        return "Access Denied", 403
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT
-            f_marker.name AS marked_by,
-            f_class.name  AS class_faculty,
-            s.section_name,
-            a.date
-        FROM attendance a
-        JOIN faculty f_marker ON f_marker.faculty_id = a.marked_by
-        JOIN faculty f_class  ON f_class.faculty_id  = a.faculty_id
-        JOIN sections s       ON s.section_id = a.section_id
-        GROUP BY f_marker.name, f_class.name, s.section_name, a.date
-        ORDER BY a.date DESC
-    """)
-
-    rows = cur.fetchall()
-
-    df = pd.DataFrame(
-        rows,
-        columns=["Marked By", "Class Faculty", "Section", "Date"]
-    )
-
-    output = io.BytesIO()
-    df.to_excel(output, index=False)
-    output.seek(0)
-
-    return send_file(
-        output,
-        as_attachment=True,
-        download_name="Faculty_Attendance_Audit.xlsx",
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-@app.route('/download-student-excel')
-def download_student_excel():
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    student_id = request.args.get('student_id', type=int)
-    selected_date = request.args.get('date')
-
-    if not student_id or not selected_date:
-        return "Missing parameters", 400
-
-    report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
-
-    query = """
-        SELECT 
-            cs.period_no,
-            cs.subject,
-            f.name,
-            a.status
-        FROM attendance a
-        JOIN class_schedule cs
-          ON cs.section_id = a.section_id
-         AND cs.faculty_id = a.faculty_id
-         AND cs.day_of_week = TO_CHAR(a.date, 'FMDay')
-        JOIN faculty f
-          ON f.faculty_id = cs.faculty_id
-        WHERE a.student_id = %s
-          AND a.date = %s
-        ORDER BY cs.period_no
-    """
-
-    cur.execute(query, (student_id, report_date))
-    rows = cur.fetchall()
-
-    df = pd.DataFrame(
-        rows,
-        columns=["Period", "Subject", "Faculty", "Status"]
-    )
-
-    # ✅ Add Date column
-    df.insert(0, "Date", report_date.strftime("%d-%m-%Y"))
-
-    output = io.BytesIO()
-    df.to_excel(output, index=False)
-    output.seek(0)
-
-    cur.close()
-    conn.close()
-
-    return send_file(
-        output,
-        as_attachment=True,
-        download_name=f"Student_Attendance_{selected_date}.xlsx",
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-
-
-
-@app.route('/faculty-dashboard')
-def faculty_dashboard():
-    if 'faculty_id' not in session or session['role'] != 'faculty':
-        return "Access Denied", 403
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    faculty_id = session['faculty_id']
-    section_id = session['section_id']
-
-    # Faculty name
-    cur.execute("SELECT name FROM faculty WHERE faculty_id=%s",
-                (faculty_id,))
-    faculty_name = cur.fetchone()[0]
-
-    # Section name
-    cur.execute("SELECT section_name FROM sections WHERE section_id=%s",
-                (section_id,))
-    section_name = cur.fetchone()[0]
-
-    # Today's day
-    today = date.today()
-    today_day = today.strftime("%A")
-
-    # Today's classes
-    cur.execute("""
-        SELECT schedule_id, subject, period_no
-        FROM class_schedule
-        WHERE faculty_id=%s
-          AND section_id=%s
-          AND day_of_week=%s
-        ORDER BY period_no
-    """, (faculty_id, section_id, today_day))
-
-    rows = cur.fetchall()
-
-    today_classes = [
-        {
-            "schedule_id": r[0],
-            "subject": r[1],
-            "period_no": r[2]
-        }
-        for r in rows
-    ]
-
-    cur.close()
-    conn.close()
-
-    return render_template(
-        "faculty_dashboard.html",
-        faculty_name=faculty_name,
-        section_name=section_name,
-        faculty_id=faculty_id,
-        section_id=section_id,
-        today=today.strftime("%d-%m-%Y"),
-        today_classes=today_classes
-    )
-
-
-@app.route('/daily-summary')
-def daily_summary():
-
-    if 'faculty_id' not in session:
-        return redirect(url_for('index'))
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    selected_date = request.args.get('date')
-    summary = []
-
-    if selected_date:
-        report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
-
-        cur.execute("""
-            SELECT 
-                f.name AS faculty_name,
-                cs.subject,
-                s.section_name,
-                COUNT(*) FILTER (WHERE a.status='Present') AS present_count,
-                COUNT(*) FILTER (WHERE a.status='Absent') AS absent_count
-            FROM attendance a
-            JOIN faculty f ON f.faculty_id = a.faculty_id
-            JOIN sections s ON s.section_id = a.section_id
-            JOIN class_schedule cs
-              ON cs.faculty_id = a.faculty_id
-             AND cs.section_id = a.section_id
-             AND cs.day_of_week = TO_CHAR(a.date, 'FMDay')
-            WHERE a.date = %s
-            GROUP BY f.name, cs.subject, s.section_name
-            ORDER BY s.section_name, f.name
-        """, (report_date,))
-
-        rows = cur.fetchall()
-
-        summary = [
-            {
-                "faculty": r[0],
-                "subject": r[1],
-                "section": r[2],
-                "present": r[3],
-                "absent": r[4]
-            }
-            for r in rows
-        ]
-
-    cur.close()
-    conn.close()
-
-    # Role-based back button
-    if session.get("role") == "faculty":
-        back_url = url_for("faculty_dashboard")
-    else:
-        back_url = url_for("admin_dashboard")
-
-    return render_template(
-        "daily_summary.html",
-        summary=summary,
-        selected_date=selected_date,
-        back_url=back_url
-    )
-
-@app.route('/load-schedule')
-def load_schedule():
-    if 'faculty_id' not in session:
-        return redirect(url_for('index'))
-
-    selected_date = request.args.get('date')
-    if not selected_date:
-        return redirect(url_for('faculty_dashboard'))
-
-    report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
-    day_name = report_date.strftime("%A")
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT schedule_id, subject, period_no
-        FROM class_schedule
-        WHERE faculty_id=%s
-          AND section_id=%s
-          AND day_of_week=%s
-        ORDER BY period_no
-    """, (
-        session['faculty_id'],
-        session['section_id'],
-        day_name
-    ))
-
-    rows = cur.fetchall()
-
-    schedules = [
-        {
-            "schedule_id": r[0],
-            "subject": r[1],
-            "period_no": r[2]
-        }
-        for r in rows
-    ]
-
-    cur.close()
-    conn.close()
-
-    return render_template(
-        "select_schedule.html",
-        schedules=schedules,
-        selected_date=selected_date
-    )
-
-@app.route('/save', methods=['POST'])
-def save():
-
-    # 🔐 Only faculty can mark
-    if 'faculty_id' not in session or session.get('role') != 'faculty':
-        return "Access Denied", 403
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    schedule_id = int(request.form['schedule_id'])
-    attendance_date = request.form['attendance_date']
-
-    # Convert YYYY-MM-DD → date
-    class_date = datetime.strptime(attendance_date, "%Y-%m-%d").date()
-
-    # 🔢 Auto-calculate week_id
-    semester_start = date(2026, 1, 19)
-    diff_days = (class_date - semester_start).days
-    week_id = (diff_days // 7) + 1
-
-    # 🔍 Get schedule details
-    cur.execute("""
-        SELECT faculty_id, section_id, group_id
-        FROM class_schedule
-        WHERE schedule_id = %s
-    """, (schedule_id,))
-    row = cur.fetchone()
-
-    if not row:
-        return "Invalid schedule", 400
-
-    faculty_id, section_id, group_id = row
-
-    # 📚 Load students
-    if group_id:
-        cur.execute("""
-            SELECT student_id
-            FROM students
-            WHERE section_id=%s AND group_id=%s
-        """, (section_id, group_id))
-    else:
-        cur.execute("""
-            SELECT student_id
-            FROM students
-            WHERE section_id=%s
-        """, (section_id,))
-
-    students = cur.fetchall()
-
-    # 📝 Insert attendance
-    for (student_id,) in students:
-
-        status = "Absent" if f"att_{student_id}" in request.form else "Present"
-
-        cur.execute("""
-            INSERT INTO attendance
-            (student_id, faculty_id, section_id, schedule_id,
-             week_id, date, status, marked_by)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
-            ON CONFLICT (student_id, schedule_id, date)
-            DO UPDATE SET
-                status = EXCLUDED.status,
-                marked_by = EXCLUDED.marked_by
-        """, (
-            student_id,
-            faculty_id,
-            section_id,
-            schedule_id,
-            week_id,
-            class_date,
-            status,
-            session['faculty_id']
-        ))
-
-    conn.commit()
-    cur.close()
-    conn.close()
-
-    # Redirect to report of that date
-    return redirect(url_for(
-        'week_report',
-        schedule_id=schedule_id,
-        date=class_date.strftime("%Y-%m-%d")
-    ))
-
-
-
-@app.route('/logout')
-def logout():
-    session.clear()
-    return redirect(url_for('index'))
-
-if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8000)
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+from flask import Flask, render_template, request, redirect, url_for, send_file
+from flask import Response, stream_with_context
+import psycopg2
+import psycopg2.extensions
+from datetime import datetime, timedelta, date, timezone
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.formatting.rule import CellIsRule, FormulaRule
+from openpyxl.styles import PatternFill
+from openpyxl.utils import get_column_letter
+import csv
+import io
+from flask import session, g, has_app_context
+from werkzeug.middleware.proxy_fix import ProxyFix
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from collections import OrderedDict, defaultdict, namedtuple
+from contextlib import contextmanager
+import bisect
+import click
+import functools
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+
+
+
+
+
+app = Flask(__name__)
+app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-key")
+
+# 🌐 Number of reverse proxies in front of the app (Heroku router = 1), so
+# request.remote_addr is the client's address for login rate limiting
+PROXY_HOPS = int(os.environ.get("PROXY_HOPS", "0"))
+if PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS)
+
+# ⚙️ Pool settings (per gunicorn worker)
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "5"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))       # seconds to wait for a free connection
+DB_CONN_MAX_AGE = float(os.environ.get("DB_CONN_MAX_AGE", "1800"))     # recycle connections after this many seconds
+DB_CONN_CHECK_IDLE = float(os.environ.get("DB_CONN_CHECK_IDLE", "30")) # ping connections idle longer than this
+DB_SSLMODE = os.environ.get("DB_SSLMODE", "require")
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+# 🔌 Supabase PostgreSQL connection pool
+class DBPool:
+
+    def __init__(self, dsn, minconn, maxconn, timeout, max_age, check_idle):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_age = max_age
+        self.check_idle = check_idle
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._idle = []        # [(conn, returned_at)]
+        self._born = {}        # id(conn) -> created_at
+
+        for _ in range(minconn):
+            conn = self._connect()
+            self._idle.append((conn, time.monotonic()))
+
+    def _connect(self):
+        conn = psycopg2.connect(
+            self.dsn,
+            sslmode=DB_SSLMODE,
+            cursor_factory=InstrumentedCursor if INSTRUMENTATION else None
+        )
+        self._born[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn):
+        self._born.pop(id(conn), None)
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _expired(self, conn):
+        born = self._born.get(id(conn), 0)
+        return time.monotonic() - born > self.max_age
+
+    def _healthy(self, conn, returned_at):
+        if conn.closed or self._expired(conn):
+            return False
+
+        # 🩺 Only ping connections that sat idle long enough to be dropped
+        if time.monotonic() - returned_at > self.check_idle:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+
+        return True
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout("No database connection free after %ss" % self.timeout)
+
+        try:
+            while True:
+                with self._lock:
+                    item = self._idle.pop() if self._idle else None
+
+                if item is None:
+                    return self._connect()
+
+                conn, returned_at = item
+                if self._healthy(conn, returned_at):
+                    return conn
+
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn):
+        try:
+            if conn.closed or self._expired(conn):
+                self._discard(conn)
+                return
+
+            # ↩️ Never hand out a connection with an open transaction
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    self._discard(conn)
+                    return
+
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+# 🔁 One pool per process (gunicorn forks workers after import)
+def get_pool():
+    global _pool, _pool_pid
+
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = DBPool(
+                    os.environ["DATABASE_URL"],
+                    DB_POOL_MIN,
+                    DB_POOL_MAX,
+                    DB_POOL_TIMEOUT,
+                    DB_CONN_MAX_AGE,
+                    DB_CONN_CHECK_IDLE
+                )
+                _pool_pid = os.getpid()
+
+    return _pool
+
+
+# 🔌 Connection for the current request (returned in teardown)
+def get_db_connection():
+    if 'db_conn' not in g:
+        g.db_conn = get_pool().getconn()
+    return g.db_conn
+
+
+# 🔌 Connection outside a request (CLI commands, background work)
+@contextmanager
+def db_connection():
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+
+@app.teardown_appcontext
+def release_db_connection(exc):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        get_pool().putconn(conn)
+
+
+@app.errorhandler(PoolTimeout)
+def pool_timeout(e):
+    return "Server busy, please retry", 503
+
+
+# ================= CONCURRENCY GATES =================
+# With threaded/gevent workers many requests share one worker's pool.
+# Heavy exports may hold at most EXPORT_CONCURRENCY connections, ordinary
+# pages at most DB_POOL_MAX - SAVE_RESERVED, and /save can use any slot,
+# so a burst of reports never leaves roll-call submissions waiting.
+EXPORT_CONCURRENCY = int(os.environ.get("EXPORT_CONCURRENCY", "1"))
+SAVE_RESERVED = int(os.environ.get("SAVE_RESERVED", "1"))
+GATE_TIMEOUT = float(os.environ.get("GATE_TIMEOUT", str(DB_POOL_TIMEOUT)))
+
+_export_gate = threading.BoundedSemaphore(max(1, EXPORT_CONCURRENCY))
+_read_gate = threading.BoundedSemaphore(max(1, DB_POOL_MAX - SAVE_RESERVED))
+
+GATES = {
+    "save": [],
+    "read": [_read_gate],
+    "export": [_export_gate, _read_gate],
+    "none": [],
+}
+
+
+# 🚦 Tag a view with its class; untagged views count as "read"
+def concurrency_class(name):
+    def mark(view):
+        view.concurrency_class = name
+        return view
+    return mark
+
+
+@app.before_request
+def enter_concurrency_gate():
+    view = app.view_functions.get(request.endpoint)
+    name = getattr(view, "concurrency_class", "read") if view else "none"
+
+    started = time.perf_counter()
+    g.gates = []
+    for gate in GATES[name]:
+        if not gate.acquire(timeout=GATE_TIMEOUT):
+            raise PoolTimeout(f"{name} requests are at their limit")
+        g.gates.append(gate)
+    g.gate_wait = time.perf_counter() - started
+
+
+@app.teardown_request
+def leave_concurrency_gate(exc):
+    for gate in reversed(g.pop("gates", [])):
+        gate.release()
+
+
+# ================= INSTRUMENTATION =================
+# Per-route and per-query latency histograms (this worker only), exposed
+# in Prometheus text format on /metrics, plus a Server-Timing header on
+# every response. Recording is a perf_counter pair, a dict lookup and a
+# bisect under a lock, so it stays on in production.
+INSTRUMENTATION = os.environ.get("INSTRUMENTATION", "1") != "0"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = defaultdict(lambda: [0] * (len(buckets) + 1))
+        self.sums = defaultdict(float)
+        self.rows = defaultdict(int)     # optional per-key row counter
+        self._lock = threading.Lock()
+
+    def observe(self, key, seconds, rows=0):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[key][i] += 1
+            self.sums[key] += seconds
+            if rows > 0:
+                self.rows[key] += rows
+
+    def row_totals(self):
+        with self._lock:
+            return sorted(self.rows.items())
+
+    def render(self, name, label):
+        lines = [f"# TYPE {name} histogram"]
+        with self._lock:
+            items = [(k, list(c), self.sums[k]) for k, c in self.counts.items()]
+
+        for key, counts, total in sorted(items):
+            running = 0
+            for bound, count in zip(self.buckets, counts):
+                running += count
+                lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {running}')
+            running += counts[-1]
+            lines.append(f'{name}_bucket{{{label}="{key}",le="+Inf"}} {running}')
+            lines.append(f'{name}_sum{{{label}="{key}"}} {total:.6f}')
+            lines.append(f'{name}_count{{{label}="{key}"}} {running}')
+        return lines
+
+
+route_latency = Histogram()
+query_latency = Histogram()        # rows: rows returned / affected
+query_text = {}                  # fingerprint -> normalised SQL
+_fingerprints = {}               # raw SQL -> fingerprint
+
+
+# 🔖 Same SQL template → same short id, whatever the parameters
+def query_fingerprint(query):
+    fp = _fingerprints.get(query)
+    if fp is None:
+        text = query.decode() if isinstance(query, bytes) else str(query)
+        normalised = " ".join(text.split())
+        fp = hashlib.sha1(normalised.encode()).hexdigest()[:10]
+        if len(_fingerprints) < 1024:
+            _fingerprints[query] = fp
+            query_text[fp] = normalised[:200]
+    return fp
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            elapsed = time.perf_counter() - started
+            fp = query_fingerprint(query)
+            query_latency.observe(fp, elapsed, self.rowcount)
+
+            if has_app_context():
+                g.db_time = g.get("db_time", 0.0) + elapsed
+                g.db_queries = g.get("db_queries", 0) + 1
+
+
+@app.before_request
+def start_request_timer():
+    if INSTRUMENTATION:
+        g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_timing(response):
+    started = g.get("request_started")
+    if started is None:
+        return response
+
+    # gate hook runs first, so add its wait back in
+    gate_wait = g.get("gate_wait", 0.0)
+    total = time.perf_counter() - started + gate_wait
+    db_time = g.get("db_time", 0.0)
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    route_latency.observe(f"{request.method} {route}", total)
+
+    response.headers["Server-Timing"] = (
+        f'gate;dur={gate_wait * 1000:.1f}, '
+        f'db;dur={db_time * 1000:.1f};desc="{g.get("db_queries", 0)} queries", '
+        f'app;dur={(total - gate_wait - db_time) * 1000:.1f}, '
+        f'total;dur={total * 1000:.1f}'
+    )
+    return response
+
+
+# 📈 Prometheus scrape endpoint. It exposes SQL text and per-route
+# latencies, so it is only served with METRICS_TOKEN set, to scrapers
+# sending it as a bearer token
+@app.route('/metrics')
+@concurrency_class("none")
+def metrics():
+    if not METRICS_TOKEN:
+        return "Not Found", 404
+
+    supplied = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        return "Access Denied", 403
+
+    lines = route_latency.render("attendance_request_seconds", "route")
+    lines += query_latency.render("attendance_query_seconds", "query")
+
+    lines.append("# TYPE attendance_query_rows_total counter")
+    for fp, rows in query_latency.row_totals():
+        lines.append(f'attendance_query_rows_total{{query="{fp}"}} {rows}')
+
+    lines.append("# TYPE attendance_query_info gauge")
+    for fp, text in sorted(query_text.items()):
+        escaped = text.replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'attendance_query_info{{query="{fp}",sql="{escaped}"}} 1')
+
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+# ================= REFERENCE DATA CACHE =================
+# faculty / sections / class_schedule / semesters change once a semester, so each worker
+# keeps them in memory. After REF_CACHE_TTL seconds the cache compares
+# reference_version (bumped by triggers, see migrations/) and only reloads
+# when it moved.
+REF_CACHE_TTL = float(os.environ.get("REF_CACHE_TTL", "300"))
+
+Faculty = namedtuple("Faculty", "faculty_id name role")
+Section = namedtuple("Section", "section_id section_name")
+Schedule = namedtuple(
+    "Schedule",
+    "schedule_id faculty_id section_id subject group_id day_of_week period_no"
+)
+
+
+class ReferenceData:
+
+    def __init__(self, version, faculty, sections, schedules, semesters):
+        self.version = version
+        self.semesters = sorted(semesters, key=lambda s: s.start_date)
+
+        self.faculty = sorted(faculty, key=lambda f: f.name)
+        self.faculty_by_id = {f.faculty_id: f for f in faculty}
+
+        self.sections = sorted(sections, key=lambda s: s.section_name)
+        self.section_names = {s.section_id: s.section_name for s in sections}
+
+        self.schedules = {s.schedule_id: s for s in schedules}
+        self.subjects = sorted({s.subject for s in schedules})
+
+        self._by_slot = defaultdict(list)      # (faculty, section, day) -> [Schedule]
+        self._by_day = defaultdict(list)       # day -> [Schedule]
+        self._subjects_by_faculty = defaultdict(set)
+        self._schedules_by_faculty = defaultdict(list)
+        self._teaching = set()                 # (faculty, section)
+
+        for s in sorted(schedules, key=lambda s: s.period_no or 0):
+            self._by_slot[(s.faculty_id, s.section_id, s.day_of_week)].append(s)
+            self._by_day[s.day_of_week].append(s)
+            self._subjects_by_faculty[s.faculty_id].add(s.subject)
+            self._schedules_by_faculty[s.faculty_id].append(s.schedule_id)
+            self._teaching.add((s.faculty_id, s.section_id))
+
+    def schedule(self, schedule_id):
+        return self.schedules.get(schedule_id)
+
+    def schedules_for(self, faculty_id, section_id, day_of_week):
+        return self._by_slot.get((faculty_id, section_id, day_of_week), [])
+
+    def schedules_on(self, day_of_week):
+        return self._by_day.get(day_of_week, [])
+
+    def section_name(self, section_id):
+        return self.section_names.get(section_id)
+
+    def faculty_name(self, faculty_id):
+        f = self.faculty_by_id.get(faculty_id)
+        return f.name if f else None
+
+    def faculty_with_role(self, role):
+        return [f for f in self.faculty if f.role == role]
+
+    def subjects_for(self, faculty_id):
+        return sorted(self._subjects_by_faculty.get(faculty_id, ()))
+
+    def teaches(self, faculty_id, section_id):
+        return (faculty_id, section_id) in self._teaching
+
+    def schedules_of(self, faculty_id):
+        return sorted(self._schedules_by_faculty.get(faculty_id, ()))
+
+    def sections_of(self, faculty_id):
+        return sorted({self.schedules[s].section_id for s in self.schedules_of(faculty_id)})
+
+    def semester_for(self, day):
+        for semester in self.semesters:
+            if day in semester:
+                return semester
+        return None
+
+    # 📅 Semester running on `day`, else the latest one already started
+    def current_semester(self, day):
+        current = self.semester_for(day)
+        if current:
+            return current
+        started = [s for s in self.semesters if s.start_date <= day]
+        if started:
+            return started[-1]
+        return self.semesters[0] if self.semesters else None
+
+
+class ReferenceCache:
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._data = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, connect):
+        data = self._data
+        if data is not None and time.monotonic() - self._checked_at < self.ttl:
+            return data
+
+        with self._lock:
+            data = self._data
+            if data is not None and time.monotonic() - self._checked_at < self.ttl:
+                return data
+
+            cur = connect().cursor()
+            cur.execute("SELECT version FROM reference_version WHERE id = 1")
+            version = cur.fetchone()[0]
+
+            if data is None or data.version != version:
+                data = self._load(cur, version)
+                self._data = data
+
+            self._checked_at = time.monotonic()
+            cur.close()
+
+        return data
+
+    def _load(self, cur, version):
+        cur.execute("SELECT faculty_id, name, role FROM faculty")
+        faculty = [Faculty(*r) for r in cur.fetchall()]
+
+        cur.execute("SELECT section_id, section_name FROM sections")
+        sections = [Section(*r) for r in cur.fetchall()]
+
+        cur.execute("""
+            SELECT schedule_id, faculty_id, section_id, subject,
+                   group_id, day_of_week, period_no
+            FROM class_schedule
+        """)
+        schedules = [Schedule(*r) for r in cur.fetchall()]
+
+        cur.execute("SELECT holiday_date, semester_id, reason FROM holidays")
+        holidays = defaultdict(dict)
+        for holiday_date, semester_id, reason in cur.fetchall():
+            holidays[semester_id][holiday_date] = reason
+
+        cur.execute("SELECT semester_id, name, start_date, total_weeks FROM semesters")
+        semesters = [
+            SemesterCalendar(semester_id, name, start_date, total_weeks, holidays[semester_id])
+            for semester_id, name, start_date, total_weeks in cur.fetchall()
+        ]
+
+        return ReferenceData(version, faculty, sections, schedules, semesters)
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+
+
+reference_cache = ReferenceCache(REF_CACHE_TTL)
+
+
+# 📚 Cached faculty / sections / timetable for this worker
+def ref_data():
+    return reference_cache.get(get_db_connection)
+
+
+
+# ================= SEMESTER CALENDAR =================
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+# 📅 One semester: O(1) date → week_id, holidays, and per-weekday class
+# dates built once and kept for as long as the reference data is current.
+class SemesterCalendar:
+
+    def __init__(self, semester_id, name, start_date, total_weeks, holidays):
+        self.semester_id = semester_id
+        self.name = name
+        self.start_date = start_date
+        self.total_weeks = total_weeks
+        self.end_date = start_date + timedelta(weeks=total_weeks, days=-1)
+        self.holidays = holidays            # date -> reason
+        self._class_dates = {}
+
+    def __contains__(self, day):
+        return self.start_date <= day <= self.end_date
+
+    def week_of(self, day):
+        if day not in self:
+            return None
+        return (day - self.start_date).days // 7 + 1
+
+    def holiday(self, day):
+        return self.holidays.get(day)
+
+    # 📆 [(week_id, date)] on which a weekday class meets, holidays excluded
+    def class_dates(self, day_of_week):
+        if day_of_week not in self._class_dates:
+            offset = (DAYS.index(day_of_week) - self.start_date.weekday()) % 7
+            day = self.start_date + timedelta(days=offset)
+            dates = []
+            while day <= self.end_date:
+                if day not in self.holidays:
+                    dates.append((self.week_of(day), day))
+                day += timedelta(weeks=1)
+            self._class_dates[day_of_week] = dates
+        return self._class_dates[day_of_week]
+
+
+# ================= RESPONSE CACHE =================
+# Reports for one date (?date=) carry an ETag built from the route, its
+# query string, the caller's role scope, the reference-data version and
+# the day's change marker (classes marked, the sum of their class_summary
+# revisions, which /save bumps, and the students version, which roster
+# imports and renames bump). A matching If-None-Match
+# gets a 304; otherwise the rendered body comes from a size-bounded LRU
+# in memory, optionally backed by RESPONSE_CACHE_DIR. The marker is one
+# indexed lookup, so a stale body is never served across processes.
+RESPONSE_CACHE = os.environ.get("RESPONSE_CACHE", "1") != "0"
+RESPONSE_CACHE_BYTES = int(os.environ.get("RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_ITEM_BYTES = int(os.environ.get("RESPONSE_CACHE_ITEM_BYTES", str(4 * 1024 * 1024)))
+RESPONSE_CACHE_DIR = os.environ.get("RESPONSE_CACHE_DIR")
+RESPONSE_CACHE_DISK_BYTES = int(os.environ.get("RESPONSE_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+
+CachedBody = namedtuple("CachedBody", "status headers body")
+CACHED_HEADERS = ("Content-Type", "Content-Disposition")
+
+
+class ResponseCache:
+
+    def __init__(self, max_bytes, max_item_bytes, directory=None, max_disk_bytes=0):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._disk_writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.resp")
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                return entry
+
+        if not self.directory:
+            return None
+
+        try:
+            with open(self._path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+            os.utime(self._path(key))
+        except (OSError, ValueError):
+            return None
+
+        entry = CachedBody(meta["status"], meta["headers"], body)
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        if len(entry.body) > self.max_item_bytes:
+            return
+
+        self._remember(key, entry)
+        if self.directory:
+            self._spill(key, entry)
+
+    def _remember(self, key, entry):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = entry
+            self._size += len(entry.body)
+
+            while self._size > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._size -= len(old.body)
+
+    def _spill(self, key, entry):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps({"status": entry.status, "headers": entry.headers}).encode() + b"\n")
+                f.write(entry.body)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            return
+
+        self._disk_writes += 1
+        if self._disk_writes % 100 == 0:
+            self._prune_disk()
+
+    # 🧹 Least recently used files go first until the directory fits
+    def _prune_disk(self):
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+
+        total = sum(f[1] for f in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+response_cache = ResponseCache(
+    RESPONSE_CACHE_BYTES, RESPONSE_CACHE_ITEM_BYTES,
+    RESPONSE_CACHE_DIR, RESPONSE_CACHE_DISK_BYTES
+)
+
+
+# 🏷️ Changes whenever any class on this date is (re-)marked or
+# backfilled, or any student is added, renamed or moved
+def attendance_marker(day):
+    cur = get_db_connection().cursor()
+    cur.execute("""
+        SELECT
+            COUNT(*),
+            COALESCE(SUM(revision), 0),
+            (SELECT version FROM students_version WHERE id = 1)
+        FROM class_summary
+        WHERE date = %s
+    """, (day,))
+    count, revisions, students = cur.fetchone()
+    cur.close()
+    return f"{count}:{revisions}:{students}"
+
+
+# 👥 Callers who see the same rendering share cache entries
+def cache_scope():
+    role = session.get('role')
+    if role in ('hod', 'ahod'):
+        return "admin"
+    if role:
+        return f"{role}:{session['faculty_id']}"
+    return "public"
+
+
+def cached_response(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        selected_date = request.args.get('date')
+        if not RESPONSE_CACHE or not selected_date:
+            return view(*args, **kwargs)
+
+        try:
+            day = datetime.strptime(selected_date, "%Y-%m-%d").date()
+        except ValueError:
+            return view(*args, **kwargs)
+
+        key = "|".join([
+            request.path,
+            urllib.parse.urlencode(sorted(request.args.items(multi=True))),
+            cache_scope(),
+            str(ref_data().version),
+            attendance_marker(day),
+        ])
+        etag = hashlib.sha1(key.encode()).hexdigest()[:20]
+
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            entry = response_cache.get(etag)
+
+            if entry:
+                response = Response(entry.body, status=entry.status, headers=entry.headers)
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+                # send_file bodies are buffered only if they fit an entry,
+                # so big workbooks still stream from their temp file;
+                # streamed CSV is not kept
+                if response.direct_passthrough:
+                    size = response.content_length
+                    if size is not None and size <= response_cache.max_item_bytes:
+                        response.direct_passthrough = False
+                        response.make_sequence()
+
+                if not response.is_streamed:
+                    response_cache.put(etag, CachedBody(
+                        response.status_code,
+                        {h: response.headers[h] for h in CACHED_HEADERS if h in response.headers},
+                        response.get_data()
+                    ))
+
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    return wrapper
+
+
+# ================= AUTH =================
+# Who is logged in is worked out once, at login, and kept in the session:
+# name, role and the sections / schedules they may act on (admins: all).
+# It is recomputed from the reference cache only when the timetable or
+# faculty list has changed since. Views declare who may use them with
+# @requires_role instead of checking the session themselves.
+ADMIN_ROLES = ('hod', 'ahod')
+
+
+class Principal:
+
+    def __init__(self, faculty_id, name, role, section_id, sections=None, schedules=None):
+        self.faculty_id = faculty_id
+        self.name = name
+        self.role = role
+        self.section_id = section_id
+        # None = unrestricted
+        self.sections = None if sections is None else frozenset(sections)
+        self.schedules = None if schedules is None else frozenset(schedules)
+
+    @classmethod
+    def for_faculty(cls, ref, faculty_id, name, role, section_id):
+        if role in ADMIN_ROLES:
+            return cls(faculty_id, name, role, section_id)
+        return cls(
+            faculty_id, name, role, section_id,
+            ref.sections_of(faculty_id), ref.schedules_of(faculty_id)
+        )
+
+    @property
+    def is_admin(self):
+        return self.role in ADMIN_ROLES
+
+    def can_see_section(self, section_id):
+        return self.sections is None or section_id in self.sections
+
+    def can_see_schedule(self, schedule_id):
+        return self.schedules is None or schedule_id in self.schedules
+
+    def save(self, ref_version):
+        session['faculty_id'] = self.faculty_id
+        session['name'] = self.name
+        session['role'] = self.role
+        session['section_id'] = self.section_id
+        session['sections'] = None if self.sections is None else sorted(self.sections)
+        session['schedules'] = None if self.schedules is None else sorted(self.schedules)
+        session['ref_version'] = ref_version
+
+
+# 👤 The logged-in user for this request (None = not logged in)
+def principal():
+    if 'faculty_id' not in session:
+        return None
+
+    if 'principal' not in g:
+        ref = ref_data()
+        if session.get('ref_version') != ref.version:
+            # 🔄 Faculty or timetable changed since login
+            f = ref.faculty_by_id.get(session['faculty_id'])
+            if f is None:
+                session.clear()
+                return None
+            Principal.for_faculty(
+                ref, f.faculty_id, f.name, f.role, session.get('section_id')
+            ).save(ref.version)
+
+        g.principal = Principal(
+            session['faculty_id'], session['name'], session['role'],
+            session['section_id'], session['sections'], session['schedules']
+        )
+    return g.principal
+
+
+# 🔐 @requires_role() = any logged-in user; @requires_role(*ADMIN_ROLES) etc.
+# Pages send anonymous visitors to the login page, everything else gets 403.
+def requires_role(*roles, login_redirect=False):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            user = principal()
+            if user is None and login_redirect:
+                return redirect(url_for('index'))
+            if user is None or (roles and user.role not in roles):
+                return "Access Denied", 403
+            return view(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+
+# ================= CREDENTIALS =================
+# Passwords are argon2id hashes. Plaintext passwords left from before are
+# still accepted and replaced by a hash on the next successful login, as
+# are hashes made with an older cost (`flask --app app hash-passwords`
+# converts the rest in one go). The cost is tunable; pick it with
+# bench/password_cost.py against the login p95 budget.
+#
+# Failed logins are throttled by token buckets per faculty_id and per
+# client IP, checked before any DB or hashing work, so guessing cannot tie
+# up workers or connections. Only failures spend tokens: the morning burst
+# of correct logins from one campus IP is never limited. Buckets live in
+# each worker process, so the effective limit is per process.
+PASSWORD_TIME_COST = int(os.environ.get("PASSWORD_TIME_COST", "2"))
+PASSWORD_MEMORY_KIB = int(os.environ.get("PASSWORD_MEMORY_KIB", "19456"))
+PASSWORD_PARALLELISM = int(os.environ.get("PASSWORD_PARALLELISM", "1"))
+
+LOGIN_FACULTY_BURST = int(os.environ.get("LOGIN_FACULTY_BURST", "5"))
+LOGIN_FACULTY_PER_MINUTE = float(os.environ.get("LOGIN_FACULTY_PER_MINUTE", "5"))
+LOGIN_IP_BURST = int(os.environ.get("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.environ.get("LOGIN_IP_PER_MINUTE", "30"))
+
+password_hasher = PasswordHasher(
+    time_cost=PASSWORD_TIME_COST,
+    memory_cost=PASSWORD_MEMORY_KIB,
+    parallelism=PASSWORD_PARALLELISM,
+)
+
+# Verified against for unknown faculty_ids, so they take as long as a
+# wrong password
+_dummy_hash = password_hasher.hash("not a password")
+
+
+def hash_password(password):
+    return password_hasher.hash(password)
+
+
+# 🔑 (ok, replacement hash or None) for a stored password
+def verify_password(stored, password):
+    if not stored.startswith("$argon2"):
+        # Legacy plaintext
+        if hmac.compare_digest(stored.encode(), password.encode()):
+            return True, hash_password(password)
+        return False, None
+
+    try:
+        password_hasher.verify(stored, password)
+    except (VerificationError, InvalidHashError):
+        return False, None
+
+    if password_hasher.check_needs_rehash(stored):
+        return True, hash_password(password)
+    return True, None
+
+
+class TokenBuckets:
+
+    def __init__(self, burst, per_minute, max_keys=10000):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()      # key -> (tokens, monotonic time)
+        self._lock = threading.Lock()
+
+    def _tokens(self, key, now):
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    # Seconds until `key` may try again (0 = now)
+    def retry_after(self, key):
+        with self._lock:
+            tokens = self._tokens(key, time.monotonic())
+        return 0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def spend(self, key):
+        now = time.monotonic()
+        with self._lock:
+            self._buckets[key] = (self._tokens(key, now) - 1, now)
+            self._buckets.move_to_end(key)
+            # Least recently failing keys have refilled by now anyway
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+
+faculty_login_buckets = TokenBuckets(LOGIN_FACULTY_BURST, LOGIN_FACULTY_PER_MINUTE)
+ip_login_buckets = TokenBuckets(LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE)
+
+
+# ================= HOME =================
+@app.route('/')
+def index():
+    ref = ref_data()
+
+    # ✅ include role
+    return render_template(
+        "index.html",
+        faculty=ref.faculty,
+        sections=ref.sections
+    )
+
+
+
+# ================= FACULTY FLOW =================
+@app.route('/faculty-login', methods=['POST'])
+def faculty_login():
+    login_type = request.form['login_type']   # faculty | admin
+    faculty_id = int(request.form['faculty_id'])
+    password = request.form['password']
+    section_id = int(request.form['section_id'])
+
+    # 🚦 Too many recent failures for this account or address
+    client_ip = request.remote_addr or "unknown"
+    wait = max(
+        faculty_login_buckets.retry_after(faculty_id),
+        ip_login_buckets.retry_after(client_ip)
+    )
+    if wait:
+        return "Too many login attempts, try again later", 429, {"Retry-After": str(int(wait) + 1)}
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT faculty_id, name, role, password
+        FROM faculty
+        WHERE faculty_id = %s
+    """, (faculty_id,))
+
+    row = cur.fetchone()
+
+    # 🔐 Unknown ids cost the same as a wrong password
+    ok, new_hash = verify_password(row[3] if row else _dummy_hash, password)
+
+    if not row or not ok:
+        cur.close()
+        faculty_login_buckets.spend(faculty_id)
+        ip_login_buckets.spend(client_ip)
+        return "Invalid credentials", 403
+
+    logged_in_id, name, role, stored = row
+
+    # 🔁 Plaintext or outdated hash → store the current one
+    if new_hash:
+        cur.execute("""
+            UPDATE faculty
+            SET password = %s
+            WHERE faculty_id = %s AND password = %s
+        """, (new_hash, logged_in_id, stored))
+        conn.commit()
+
+    cur.close()
+
+    # 🚫 Role misuse protection
+    if login_type == 'faculty' and role != 'faculty':
+        return "Use HOD/AHOD login", 403
+
+    if login_type == 'admin' and role not in ADMIN_ROLES:
+        return "Unauthorized admin access", 403
+
+    # 👤 Name, role and allowed sections / schedules, worked out once
+    ref = ref_data()
+    user = Principal.for_faculty(ref, logged_in_id, name, role, section_id)
+
+    # 🔎 Check if faculty actually teaches this section
+    if not user.can_see_section(section_id):
+        return "You are not assigned to this section.", 403
+
+    # 🔐 Create session
+    session.clear()
+    user.save(ref.version)
+
+    # 🔀 Redirect properly
+    if user.is_admin:
+      return redirect(url_for('admin_dashboard'))
+    else:
+      return redirect(url_for('faculty_dashboard'))
+
+
+
+@app.route('/admin-dashboard')
+@requires_role(*ADMIN_ROLES)
+def admin_dashboard():
+    ref = ref_data()
+    admin_name = principal().name
+    section_name = ref.section_name(int(session['section_id']))
+
+    return render_template(
+        "admin_dashboard.html",
+        admin_name=admin_name,
+        faculty_id=session['faculty_id'],
+        section_id=session['section_id'],
+        section_name=section_name
+    )
+@app.route('/faculty-audit')
+@requires_role(*ADMIN_ROLES)
+@cached_response
+def faculty_audit():
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    selected_date = request.args.get('date')
+    rows = []
+    no_class = False
+
+    if selected_date:
+        report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
+
+        # 🔎 Check if ANY class scheduled that day
+        class_count = len(ref_data().schedules_on(report_date.strftime("%A")))
+
+        if class_count == 0:
+            no_class = True
+        else:
+            # 🔍 Fetch audit records for selected date
+            cur.execute("""
+                SELECT DISTINCT
+                    cl.date,
+                    f_marker.name AS marked_by,
+                    f_marker.role AS marker_role,
+                    f_class.name  AS class_faculty,
+                    s.section_name
+                FROM class_summary cl
+                JOIN faculty f_marker 
+                    ON f_marker.faculty_id = cl.marked_by
+                JOIN faculty f_class  
+                    ON f_class.faculty_id = cl.faculty_id
+                JOIN sections s       
+                    ON s.section_id = cl.section_id
+                WHERE cl.date = %s
+                ORDER BY f_class.name
+            """, (report_date,))
+
+            rows = cur.fetchall()
+
+    else:
+        # 🔍 Default → Show latest records
+        cur.execute("""
+            SELECT DISTINCT
+                cl.date,
+                f_marker.name AS marked_by,
+                f_marker.role AS marker_role,
+                f_class.name  AS class_faculty,
+                s.section_name
+            FROM class_summary cl
+            JOIN faculty f_marker 
+                ON f_marker.faculty_id = cl.marked_by
+            JOIN faculty f_class  
+                ON f_class.faculty_id = cl.faculty_id
+            JOIN sections s       
+                ON s.section_id = cl.section_id
+            ORDER BY cl.date DESC
+            LIMIT 50
+        """)
+
+        rows = cur.fetchall()
+
+    cur.close()
+
+    ref = ref_data()
+
+    return render_template(
+        "faculty_audit.html",
+        rows=rows,
+        selected_date=selected_date,
+        no_class=no_class,
+        faculty=ref.faculty,
+        sections=ref.sections
+    )
+
+AUDIT_LOG_PAGE = 200
+AUDIT_LOG_MAX_PAGE = 1000
+
+
+# 📜 /faculty-audit-log?[from=&to=][&marked_by=][&faculty_id=][&section_id=]
+#                     [&after=YYYY-MM-DD:section:faculty:marker][&limit=]
+# Keyset-paginated, newest first: one row per (date, section, class
+# faculty, marker) from class_summary, names filled in from the cache.
+@app.route('/faculty-audit-log')
+@requires_role(*ADMIN_ROLES)
+def faculty_audit_log():
+    args = request.args
+    where = []
+    params = []
+
+    try:
+        if args.get('from'):
+            where.append("cl.date >= %s")
+            params.append(datetime.strptime(args['from'], "%Y-%m-%d").date())
+        if args.get('to'):
+            where.append("cl.date <= %s")
+            params.append(datetime.strptime(args['to'], "%Y-%m-%d").date())
+
+        for column in ('marked_by', 'faculty_id', 'section_id'):
+            if args.get(column):
+                where.append(f"cl.{column} = %s")
+                params.append(int(args[column]))
+
+        if args.get('after'):
+            day, section_id, faculty_id, marked_by = args['after'].split(":")
+            where.append("(cl.date, cl.section_id, cl.faculty_id, cl.marked_by) < (%s, %s, %s, %s)")
+            params.extend([
+                datetime.strptime(day, "%Y-%m-%d").date(),
+                int(section_id), int(faculty_id), int(marked_by)
+            ])
+
+        limit = max(1, min(args.get('limit', AUDIT_LOG_PAGE, type=int), AUDIT_LOG_MAX_PAGE))
+    except ValueError:
+        return "Invalid parameters", 400
+
+    cur = get_db_connection().cursor()
+    cur.execute(f"""
+        SELECT DISTINCT cl.date, cl.section_id, cl.faculty_id, cl.marked_by
+        FROM class_summary cl
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY cl.date DESC, cl.section_id DESC, cl.faculty_id DESC, cl.marked_by DESC
+        LIMIT %s
+    """, (*params, limit))
+    rows = cur.fetchall()
+    cur.close()
+
+    ref = ref_data()
+    last = rows[-1] if len(rows) == limit else None
+
+    return {
+        "rows": [
+            {
+                "date": day.isoformat(),
+                "section": ref.section_name(section_id),
+                "class_faculty": ref.faculty_name(faculty_id),
+                "marked_by": ref.faculty_name(marked_by),
+                "marker_role": getattr(ref.faculty_by_id.get(marked_by), "role", None),
+                "substitute": marked_by != faculty_id
+            }
+            for day, section_id, faculty_id, marked_by in rows
+        ],
+        "next": f"{last[0].isoformat()}:{last[1]}:{last[2]}:{last[3]}" if last else None
+    }
+
+
+@app.route('/admin-attendance', methods=['GET'])
+@requires_role(*ADMIN_ROLES)
+def admin_attendance():
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    selected_faculty = request.args.get('faculty_id', type=int)
+    selected_subject = request.args.get('subject')
+    selected_date = request.args.get('date')
+
+    ref = ref_data()
+
+    # Load faculty dropdown
+    faculty_list = ref.faculty_with_role('faculty')
+
+    subjects = []
+    report = []
+    present_count = absent_count = None
+    no_class = False
+    not_marked = False
+
+    if selected_faculty:
+        subjects = ref.subjects_for(selected_faculty)
+
+    if selected_faculty and selected_subject and selected_date:
+
+        report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
+        day_name = report_date.strftime("%A")  # Monday, Tuesday etc
+
+        # 🔍 Check if class scheduled that day (timetable cache, no query)
+        class_exists = any(
+            s.faculty_id == selected_faculty and s.subject == selected_subject
+            for s in ref.schedules_on(day_name)
+        )
+
+        if not class_exists:
+            no_class = True
+        else:
+            # 🔍 Fetch attendance, totals riding along as window counts
+            cur.execute("""
+                SELECT
+                    s.roll_no,
+                    a.status,
+                    COUNT(*) FILTER (WHERE a.status='Present') OVER (),
+                    COUNT(*) FILTER (WHERE a.status='Absent') OVER ()
+                FROM attendance a
+                JOIN students s ON s.student_id = a.student_id
+                WHERE a.faculty_id=%s
+                  AND a.date=%s
+                ORDER BY s.roll_no
+            """, (selected_faculty, report_date))
+
+            rows = cur.fetchall()
+
+            if not rows:
+                not_marked = True
+            else:
+                report = [{"roll": r[0], "status": r[1]} for r in rows]
+                present_count, absent_count = rows[0][2:]
+
+    cur.close()
+
+    return render_template(
+        "admin_readonly.html",
+        faculty_list=faculty_list,
+        subjects=subjects,
+        report=report,
+        selected_faculty=selected_faculty,
+        selected_subject=selected_subject,
+        selected_date=selected_date,
+        present_count=present_count,
+        absent_count=absent_count,
+        no_class=no_class,
+        not_marked=not_marked
+    )
+
+
+
+
+@app.route('/select', methods=['POST'])
+def select():
+    faculty_id = request.form['faculty_id']
+    section_id = request.form['section_id']
+    return redirect(url_for('attendance', faculty_id=faculty_id, section_id=section_id))
+
+
+@app.route('/attendance/<int:schedule_id>')
+@requires_role(login_redirect=True)
+def attendance(schedule_id):
+    # 🔍 Get schedule details
+    schedule = ref_data().schedule(schedule_id)
+
+    if not schedule:
+        return "Invalid Schedule", 404
+
+    faculty_id = schedule.faculty_id
+    section_id = schedule.section_id
+    subject = schedule.subject
+    group_id = schedule.group_id
+
+    # 🔐 Restrict normal faculty
+    if not principal().can_see_schedule(schedule_id):
+        return "Access Denied", 403
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    # 📚 Load correct students
+    if group_id:
+        cur.execute("""
+            SELECT student_id, roll_no, name
+            FROM students
+            WHERE section_id=%s AND group_id=%s
+            ORDER BY roll_no
+        """, (section_id, group_id))
+    else:
+        cur.execute("""
+            SELECT student_id, roll_no, name
+            FROM students
+            WHERE section_id=%s
+            ORDER BY roll_no
+        """, (section_id,))
+
+    students = cur.fetchall()
+
+    cur.close()
+
+    # 📅 Only the dates this class meets in the current semester
+    semester = ref_data().current_semester(date.today())
+    class_dates = semester.class_dates(schedule.day_of_week) if semester else []
+
+    return render_template(
+        "attendance.html",
+        students=students,
+        faculty_id=faculty_id,
+        section_id=section_id,
+        schedule_id=schedule_id,
+        subject=subject,
+        day_of_week=schedule.day_of_week,
+        semester=semester,
+        class_dates=class_dates
+    )
+
+
+# ================= WEEK REPORT ================= 
+@app.route('/week-report')
+@requires_role(login_redirect=True)
+@cached_response
+def week_report():
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    selected_date = request.args.get('date')
+    schedule_id = request.args.get('schedule_id', type=int)
+    status_filter = request.args.get('filter', 'Absent')   # Default = Absent
+
+    if not selected_date or not schedule_id:
+        return render_template(
+            "week_report.html",
+            report=None,
+            schedule_id=schedule_id,
+            selected_date=selected_date,
+            filter=status_filter
+        )
+
+    report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
+
+    # 🔎 Get schedule info
+    schedule = ref_data().schedule(schedule_id)
+
+    if not schedule:
+        return "Invalid schedule", 404
+
+    faculty_id, subject = schedule.faculty_id, schedule.subject
+
+    # 🔐 Restrict normal faculty
+    if not principal().can_see_schedule(schedule_id):
+        return "Access Denied", 403
+
+    # 🔎 Filtered rows and the (unfiltered) class totals in one query:
+    # no summary row → class not marked; a NULL roll → nothing matched
+    cur.execute("""
+        SELECT s.roll_no, s.name, a.status, cl.present, cl.absent
+        FROM class_summary cl
+        LEFT JOIN attendance a
+          ON a.date = cl.date
+         AND a.schedule_id = cl.schedule_id
+         AND (%(status)s = 'All' OR a.status = %(status)s)
+        LEFT JOIN students s ON s.student_id = a.student_id
+        WHERE cl.date = %(date)s
+          AND cl.schedule_id = %(schedule_id)s
+        ORDER BY s.roll_no
+    """, {"date": report_date, "schedule_id": schedule_id, "status": status_filter})
+    rows = cur.fetchall()
+
+    report = [
+        {"roll": r[0], "name": r[1], "status": r[2]}
+        for r in rows
+        if r[0] is not None
+    ]
+
+    present_count, absent_count = rows[0][3:] if rows else (0, 0)
+
+    cur.close()
+
+    return render_template(
+        "week_report.html",
+        report=report,
+        selected_date=selected_date,
+        present_count=present_count,
+        absent_count=absent_count,
+        subject=subject,
+        schedule_id=schedule_id,
+        filter=status_filter
+    )
+
+# ================= STUDENT REPORT =================
+@app.route('/student-report')
+def student_report():
+    return render_template("student_report.html", sections=ref_data().sections)
+
+
+@app.route('/get-students/<int:section_id>')
+def get_students(section_id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT student_id, roll_no, name
+        FROM students
+        WHERE section_id=%s
+        ORDER BY roll_no
+    """, (section_id,))
+    students = cur.fetchall()
+
+    return {
+        "students": [
+            {"id": s[0], "roll": s[1], "name": s[2]}
+            for s in students
+        ]
+    }
+
+
+@app.route('/get-subjects')
+def get_subjects():
+    return {"subjects": ref_data().subjects}
+
+# 🧑‍🎓 One student's periods on one day (attendance → its own schedule row)
+STUDENT_DAY_SQL = """
+    SELECT
+        cs.period_no,
+        cs.subject,
+        f.name AS faculty_name,
+        a.status
+    FROM attendance a
+    JOIN class_schedule cs
+      ON cs.schedule_id = a.schedule_id
+    JOIN faculty f
+      ON f.faculty_id = cs.faculty_id
+    WHERE a.student_id = %s
+      AND a.date = %s
+    ORDER BY cs.period_no
+"""
+
+
+@app.route('/get-student-attendance/<int:student_id>')
+@cached_response
+def get_student_attendance(student_id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    selected_date = request.args.get('date')
+
+    if not selected_date:
+        return {"attendance": []}
+
+    report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
+
+    cur.execute(STUDENT_DAY_SQL, (student_id, report_date))
+    rows = cur.fetchall()
+
+    cur.close()
+
+    return {
+        "attendance": [
+            {
+                "period": r[0],
+                "subject": r[1],
+                "faculty": r[2],
+                "status": r[3]
+            }
+            for r in rows
+        ]
+    }
+
+
+
+# 🧑‍🎓 One student's periods over a date range, keyset-ordered by (date, period)
+def student_range_query(student_id, date_from, date_to, subject=None, after=None, limit=None):
+    query = """
+        SELECT
+            a.date,
+            cs.period_no,
+            cs.subject,
+            f.name AS faculty_name,
+            a.status
+        FROM attendance a
+        JOIN class_schedule cs
+          ON cs.schedule_id = a.schedule_id
+        JOIN faculty f
+          ON f.faculty_id = cs.faculty_id
+        WHERE a.student_id = %s
+          AND a.date BETWEEN %s AND %s
+    """
+    params = [student_id, date_from, date_to]
+
+    if subject:
+        query += " AND cs.subject = %s"
+        params.append(subject)
+
+    if after:
+        query += " AND (a.date, cs.period_no) > (%s, %s)"
+        params.extend(after)
+
+    query += " ORDER BY a.date, cs.period_no"
+
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit)
+
+    return query, tuple(params)
+
+
+STUDENT_RANGE_PAGE = 500
+STUDENT_RANGE_MAX_PAGE = 2000
+
+
+# 📅 /get-student-attendance-range/<id>?from=&to=[&subject=][&after=YYYY-MM-DD:period][&limit=]
+# Columnar: status[i][j] / cls[i][j] are for dates[i] × periods[j];
+# cls indexes into classes ([subject, faculty]). "next" is the cursor
+# for the following page (a date can continue on the next page).
+@app.route('/get-student-attendance-range/<int:student_id>')
+def get_student_attendance_range(student_id):
+    date_from = request.args.get('from')
+    date_to = request.args.get('to')
+
+    if not date_from or not date_to:
+        return "Missing parameters", 400
+
+    try:
+        date_from = datetime.strptime(date_from, "%Y-%m-%d").date()
+        date_to = datetime.strptime(date_to, "%Y-%m-%d").date()
+
+        after = None
+        if request.args.get('after'):
+            after_date, after_period = request.args['after'].split(":")
+            after = (datetime.strptime(after_date, "%Y-%m-%d").date(), int(after_period))
+    except ValueError:
+        return "Invalid parameters", 400
+
+    subject = request.args.get('subject') or None
+    limit = max(1, min(request.args.get('limit', STUDENT_RANGE_PAGE, type=int), STUDENT_RANGE_MAX_PAGE))
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    # One extra row tells us whether another page exists
+    query, params = student_range_query(
+        student_id, date_from, date_to, subject, after, limit + 1
+    )
+    cur.execute(query, params)
+    rows = cur.fetchall()
+    cur.close()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    dates = sorted({r[0] for r in rows})
+    periods = sorted({r[1] for r in rows})
+    date_index = {d: i for i, d in enumerate(dates)}
+    period_index = {p: j for j, p in enumerate(periods)}
+
+    classes = []
+    class_index = {}
+    status = [[None] * len(periods) for _ in dates]
+    cls = [[None] * len(periods) for _ in dates]
+
+    for class_date, period_no, subject_name, faculty_name, mark in rows:
+        key = (subject_name, faculty_name)
+        if key not in class_index:
+            class_index[key] = len(classes)
+            classes.append([subject_name, faculty_name])
+
+        i, j = date_index[class_date], period_index[period_no]
+        status[i][j] = "P" if mark == "Present" else "A"
+        cls[i][j] = class_index[key]
+
+    next_cursor = None
+    if has_more:
+        last_date, last_period = rows[-1][0], rows[-1][1]
+        next_cursor = f"{last_date.isoformat()}:{last_period}"
+
+    return {
+        "dates": [d.isoformat() for d in dates],
+        "periods": periods,
+        "classes": classes,
+        "status": status,
+        "cls": cls,
+        "next": next_cursor
+    }
+
+
+# ================= ATTENDANCE BITMAPS =================
+# Compact copy of the marks: one attendance_bitmaps row per class held,
+# with one bit per roster student (roll-number order, MSB first, 1 =
+# absent). The roster itself is stored once per distinct student list in
+# attendance_rosters, keyed by the md5 of the array. /save keeps both in
+# step with attendance; `flask --app app rebuild-bitmaps` recomputes them.
+
+# 🧮 Appended to a WITH that defines marks(student_id, schedule_id, date,
+# status). Written for psycopg2 with parameters (hence %%).
+BITMAP_CTES = """
+    bits AS (
+        SELECT
+            m.schedule_id,
+            m.date,
+            m.student_id,
+            (m.status = 'Absent')::int AS absent,
+            row_number() OVER (
+                PARTITION BY m.schedule_id, m.date
+                ORDER BY st.roll_no, m.student_id
+            ) - 1 AS pos
+        FROM marks m
+        JOIN students st ON st.student_id = m.student_id
+    ),
+    bytes AS (
+        SELECT schedule_id, date, pos / 8 AS byte_no,
+               SUM(absent << (7 - pos %% 8)::int) AS val
+        FROM bits
+        GROUP BY schedule_id, date, pos / 8
+    ),
+    packed AS (
+        SELECT
+            b.schedule_id,
+            b.date,
+            r.student_ids,
+            md5(r.student_ids::text)::uuid AS roster_key,
+            decode(string_agg(lpad(to_hex(b.val), 2, '0'), '' ORDER BY b.byte_no), 'hex') AS absent
+        FROM bytes b
+        JOIN (
+            SELECT schedule_id, date, array_agg(student_id ORDER BY pos) AS student_ids
+            FROM bits
+            GROUP BY schedule_id, date
+        ) r ON r.schedule_id = b.schedule_id AND r.date = b.date
+        GROUP BY b.schedule_id, b.date, r.student_ids
+    ),
+    rosters AS (
+        INSERT INTO attendance_rosters (roster_key, student_ids)
+        SELECT DISTINCT roster_key, student_ids
+        FROM packed
+        ON CONFLICT (roster_key) DO NOTHING
+    ),
+    bitmaps AS (
+        INSERT INTO attendance_bitmaps (schedule_id, date, roster_key, absent)
+        SELECT schedule_id, date, roster_key, absent
+        FROM packed
+        ON CONFLICT (schedule_id, date)
+        DO UPDATE SET
+            roster_key = EXCLUDED.roster_key,
+            absent = EXCLUDED.absent
+    )
+"""
+
+
+# (schedule_id, absent bitmap, roster) rows → per (student, schedule)
+# classes held and absences, as parallel arrays
+def bitmap_totals(rows):
+    groups = defaultdict(list)
+    for schedule_id, absent, roster in rows:
+        groups[(schedule_id, tuple(roster))].append(bytes(absent))
+
+    if not groups:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty
+
+    students, schedules, held, absent = [], [], [], []
+    for (schedule_id, roster), bitmaps in groups.items():
+        packed = np.frombuffer(b"".join(bitmaps), dtype=np.uint8).reshape(len(bitmaps), -1)
+        bits = np.unpackbits(packed, axis=1, count=len(roster))
+
+        students.append(np.asarray(roster, dtype=np.int64))
+        schedules.append(np.full(len(roster), schedule_id, dtype=np.int64))
+        held.append(np.full(len(roster), len(bitmaps), dtype=np.int64))
+        absent.append(bits.sum(axis=0, dtype=np.int64))
+
+    return group_sum(
+        np.concatenate(students), np.concatenate(schedules),
+        np.concatenate(held), np.concatenate(absent)
+    )
+
+
+# Sum values over duplicate (a, b) keys → unique a, b and the sums
+def group_sum(a, b, *values):
+    keys, inverse = np.unique(np.stack([a, b], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    sums = [np.bincount(inverse, weights=v, minlength=len(keys)).astype(np.int64) for v in values]
+    return (keys[:, 0], keys[:, 1], *sums)
+
+
+# % present; NaN where nothing was held
+def attendance_percentages(held, absent):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(held > 0, (held - absent) * 100.0 / held, np.nan)
+
+
+def shortage_mask(held, absent, threshold=75.0):
+    return attendance_percentages(held, absent) < threshold
+
+
+# 📊 Section-wide attendance % per student per subject: all-time from
+# attendance_rollup, or ?from=&to= from the absentee bitmaps
+@app.route('/section-percentages/<int:section_id>')
+@requires_role()
+def section_percentages(section_id):
+    if not principal().can_see_section(section_id):
+        return "Access Denied", 403
+
+    below = request.args.get('below', type=float)   # e.g. 75 → shortage list only
+
+    if request.args.get('from') and request.args.get('to'):
+        try:
+            date_from = datetime.strptime(request.args['from'], "%Y-%m-%d").date()
+            date_to = datetime.strptime(request.args['to'], "%Y-%m-%d").date()
+        except ValueError:
+            return "Invalid parameters", 400
+
+        return section_percentages_between(section_id, date_from, date_to, below)
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT
+            s.student_id,
+            s.roll_no,
+            s.name,
+            cs.subject,
+            SUM(r.present),
+            SUM(r.absent)
+        FROM students s
+        JOIN attendance_rollup r ON r.student_id = s.student_id
+        JOIN class_schedule cs ON cs.schedule_id = r.schedule_id
+        WHERE s.section_id = %s
+        GROUP BY s.student_id, s.roll_no, s.name, cs.subject
+        ORDER BY s.roll_no, cs.subject
+    """, (section_id,))
+    rows = cur.fetchall()
+    cur.close()
+
+    subjects = sorted({r[3] for r in rows})
+    column = {subject: i for i, subject in enumerate(subjects)}
+
+    students = {}
+    for student_id, roll, name, subject, present, absent in rows:
+        entry = students.setdefault(student_id, {
+            "id": student_id,
+            "roll": roll,
+            "name": name,
+            "percentages": [None] * len(subjects)
+        })
+        held = present + absent
+        if held:
+            entry["percentages"][column[subject]] = round(present * 100.0 / held, 1)
+
+    grid = list(students.values())
+
+    if below is not None:
+        grid = [
+            s for s in grid
+            if any(p is not None and p < below for p in s["percentages"])
+        ]
+
+    return {
+        "subjects": subjects,
+        "students": grid
+    }
+
+
+def section_percentages_between(section_id, date_from, date_to, below):
+    ref = ref_data()
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT student_id, roll_no, name
+        FROM students
+        WHERE section_id = %s
+        ORDER BY roll_no
+    """, (section_id,))
+    roster = cur.fetchall()
+
+    cur.execute("""
+        SELECT b.schedule_id, b.absent, r.student_ids
+        FROM attendance_bitmaps b
+        JOIN attendance_rosters r ON r.roster_key = b.roster_key
+        JOIN class_schedule cs ON cs.schedule_id = b.schedule_id
+        WHERE cs.section_id = %s
+          AND b.date BETWEEN %s AND %s
+    """, (section_id, date_from, date_to))
+    students, schedules, held, absent = bitmap_totals(cur.fetchall())
+    cur.close()
+
+    # per (student, schedule) → per (student, subject); schedules missing
+    # from this worker's reference cache (deleted, or not reloaded yet)
+    # are left out
+    known = [ref.schedule(int(sid)) for sid in np.unique(schedules)]
+    subject_of = {s.schedule_id: s.subject for s in known if s}
+    keep = np.isin(schedules, list(subject_of))
+    students, schedules, held, absent = students[keep], schedules[keep], held[keep], absent[keep]
+
+    subjects = sorted(set(subject_of.values()))
+    column = {subject: i for i, subject in enumerate(subjects)}
+    subject_idx = np.array([column[subject_of[int(s)]] for s in schedules], dtype=np.int64)
+    students, subject_idx, held, absent = group_sum(students, subject_idx, held, absent)
+
+    percent = np.round(attendance_percentages(held, absent), 1)
+    row = pd.Index([r[0] for r in roster]).get_indexer(students)
+    keep = row >= 0
+
+    grid = np.full((len(roster), len(subjects)), np.nan)
+    grid[row[keep], subject_idx[keep]] = percent[keep]
+
+    show = np.ones(len(roster), dtype=bool)
+    if below is not None:
+        short = np.zeros(len(roster), dtype=bool)
+        np.logical_or.at(short, row[keep], shortage_mask(held, absent, below)[keep])
+        show = short
+
+    return {
+        "subjects": subjects,
+        "students": [
+            {
+                "id": student_id,
+                "roll": roll,
+                "name": name,
+                "percentages": [None if np.isnan(p) else float(p) for p in grid[i]]
+            }
+            for i, (student_id, roll, name) in enumerate(roster)
+            if show[i]
+        ]
+    }
+
+
+# ================= SECTION MATRIX =================
+# students × (date, period) for one section. The database hands back one
+# row per class held (student ids and statuses as arrays) and NumPy
+# scatters them into the grid in one assignment.
+def build_section_matrix(section_id, date_from, date_to):
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT student_id, roll_no, name
+        FROM students
+        WHERE section_id = %s
+        ORDER BY roll_no
+    """, (section_id,))
+    roster = cur.fetchall()
+
+    cur.execute("""
+        SELECT
+            a.date,
+            cs.period_no,
+            cs.subject,
+            array_agg(a.student_id),
+            array_agg(a.status = 'Present')
+        FROM attendance a
+        JOIN class_schedule cs ON cs.schedule_id = a.schedule_id
+        WHERE a.section_id = %s
+          AND a.date BETWEEN %s AND %s
+        GROUP BY a.date, cs.period_no, cs.subject, a.schedule_id
+        ORDER BY a.date, cs.period_no
+    """, (section_id, date_from, date_to))
+    columns = cur.fetchall()
+    cur.close()
+
+    # -1 = not marked / not in this class, 0 = absent, 1 = present
+    grid = np.full((len(roster), len(columns)), -1, dtype=np.int8)
+
+    if roster and columns:
+        lengths = np.fromiter((len(c[3]) for c in columns), dtype=np.int64, count=len(columns))
+        ids = np.concatenate([np.asarray(c[3], dtype=np.int64) for c in columns])
+        present = np.concatenate([np.asarray(c[4], dtype=bool) for c in columns])
+        col_idx = np.repeat(np.arange(len(columns)), lengths)
+
+        row_idx = pd.Index([r[0] for r in roster]).get_indexer(ids)
+        known = row_idx >= 0          # students who since left the section
+        grid[row_idx[known], col_idx[known]] = present[known]
+
+    held = (grid >= 0).sum(axis=1)
+    attended = (grid == 1).sum(axis=1)
+    percent = np.where(held > 0, np.round(attended * 100.0 / np.maximum(held, 1), 1), np.nan)
+
+    return {
+        "students": [
+            {"id": r[0], "roll": r[1], "name": r[2]}
+            for r in roster
+        ],
+        "columns": [
+            {"date": c[0].isoformat(), "period": c[1], "subject": c[2]}
+            for c in columns
+        ],
+        "grid": grid,
+        "held": held,
+        "attended": attended,
+        "percent": percent
+    }
+
+
+# (section_id, from, to), None if any is missing; ValueError if malformed
+def matrix_args():
+    section_id = request.args.get('section_id', type=int)
+    date_from = request.args.get('from')
+    date_to = request.args.get('to')
+
+    if not section_id or not date_from or not date_to:
+        return None
+
+    return (
+        section_id,
+        datetime.strptime(date_from, "%Y-%m-%d").date(),
+        datetime.strptime(date_to, "%Y-%m-%d").date()
+    )
+
+
+# 🧮 JSON: matrix[i][j] is "P" / "A" / null for students[i] × columns[j]
+@app.route('/get-section-matrix')
+@requires_role()
+@concurrency_class("export")
+def get_section_matrix():
+    try:
+        args = matrix_args()
+    except ValueError:
+        return "Invalid parameters", 400
+
+    if not args:
+        return "Missing parameters", 400
+
+    if not principal().can_see_section(args[0]):
+        return "Access Denied", 403
+
+    m = build_section_matrix(*args)
+    codes = np.array([None, "A", "P"], dtype=object)[m["grid"] + 1]
+
+    return {
+        "students": m["students"],
+        "columns": m["columns"],
+        "matrix": codes.tolist(),
+        "percent": [None if np.isnan(p) else float(p) for p in m["percent"]]
+    }
+
+
+@app.route('/section-matrix')
+@requires_role(login_redirect=True)
+@concurrency_class("export")
+def section_matrix():
+    try:
+        args = matrix_args()
+    except ValueError:
+        return "Invalid parameters", 400
+
+    if args and not principal().can_see_section(args[0]):
+        return "Access Denied", 403
+
+    matrix = build_section_matrix(*args) if args else None
+
+    if session.get("role") == "faculty":
+        back_url = url_for("faculty_dashboard")
+    else:
+        back_url = url_for("admin_dashboard")
+
+    return render_template(
+        "section_matrix.html",
+        sections=ref_data().sections,
+        section_id=request.args.get('section_id', type=int),
+        date_from=request.args.get('from'),
+        date_to=request.args.get('to'),
+        matrix=matrix,
+        back_url=back_url
+    )
+
+
+# ================= SHORTAGE REPORT =================
+# Students below the attendance threshold in a subject, for one section or
+# the whole department, over the semester up to a date. Absentee bitmaps
+# stream in through a server-side cursor and are reduced to per (student,
+# schedule) totals (bitmap_totals), so memory follows students ×
+# schedules rather than marks. pandas then groups per student × subject
+# (categorical subjects and sections) and NumPy derives:
+#   projected - % by semester end if every remaining class is attended
+#   needed    - consecutive classes to attend to get back to the threshold
+SHORTAGE_THRESHOLD = float(os.environ.get("SHORTAGE_THRESHOLD", "75"))
+
+SHORTAGE_COLUMNS = [
+    "section", "roll", "name", "subject", "held", "attended",
+    "percent", "remaining", "projected", "needed", "recoverable"
+]
+SHORTAGE_HEADER = [
+    "Section", "Roll No", "Name", "Subject", "Held", "Attended",
+    "%", "Classes Left", "Best Possible %", "Classes Needed", "Recoverable"
+]
+
+
+def remaining_classes(semester, schedule, after):
+    dates = [d for _, d in semester.class_dates(schedule.day_of_week)]
+    return len(dates) - bisect.bisect_right(dates, after)
+
+
+def build_shortage_report(conn, section_id=None, threshold=SHORTAGE_THRESHOLD, as_of=None):
+    ref = ref_data()
+    semester = ref.current_semester(as_of or date.today())
+    if not semester:
+        return None
+
+    upto = min(as_of or date.today(), semester.end_date)
+    threshold = min(max(threshold, 0.0), 99.9)
+
+    bitmaps = stream_rows("""
+        SELECT b.schedule_id, b.absent, r.student_ids
+        FROM attendance_bitmaps b
+        JOIN attendance_rosters r ON r.roster_key = b.roster_key
+        JOIN class_schedule cs ON cs.schedule_id = b.schedule_id
+        WHERE b.date BETWEEN %(from)s AND %(to)s
+          AND (%(section)s::int IS NULL OR cs.section_id = %(section)s)
+    """, {"from": semester.start_date, "to": upto, "section": section_id},
+        name="shortage", conn=conn)
+    students, schedules, held, absent = bitmap_totals(bitmaps)
+
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT student_id, roll_no, name, section_id
+        FROM students
+        WHERE %(section)s::int IS NULL OR section_id = %(section)s
+    """, {"section": section_id})
+    roster = pd.DataFrame(cur.fetchall(), columns=["student_id", "roll", "name", "section_id"])
+    cur.close()
+
+    # 📚 Per schedule: subject and classes still to come this semester
+    known = [ref.schedule(int(sid)) for sid in np.unique(schedules)]
+    known = [s for s in known if s]
+    subject_of = pd.Series({s.schedule_id: s.subject for s in known}, dtype=object)
+    remaining_of = pd.Series(
+        {s.schedule_id: remaining_classes(semester, s, upto) for s in known}, dtype=np.int64
+    )
+
+    df = pd.DataFrame({
+        "student_id": students,
+        "schedule_id": schedules,
+        "held": held,
+        "absent": absent,
+    })
+    df["subject"] = df["schedule_id"].map(subject_of).astype("category")
+    df["remaining"] = df["schedule_id"].map(remaining_of).fillna(0).astype(np.int64)
+    df = (
+        df.dropna(subset=["subject"])
+          .groupby(["student_id", "subject"], observed=True)[["held", "absent", "remaining"]]
+          .sum()
+          .reset_index()
+    )
+
+    held = df["held"].to_numpy()
+    attended = held - df["absent"].to_numpy()
+    remaining = df["remaining"].to_numpy()
+    percent = attendance_percentages(held, df["absent"].to_numpy())
+    target = threshold / 100.0
+
+    df["attended"] = attended
+    df["percent"] = np.round(percent, 1)
+    df["projected"] = np.round((attended + remaining) * 100.0 / np.maximum(held + remaining, 1), 1)
+    df["needed"] = np.ceil((target * held - attended) / (1 - target) - 1e-9).clip(min=0).astype(np.int64)
+    df["recoverable"] = np.where(df["needed"] <= remaining, "Yes", "No")
+
+    short = df[percent < threshold].merge(roster, on="student_id")
+    short["section"] = pd.Categorical(
+        short["section_id"].map(ref.section_name),
+        categories=[s.section_name for s in ref.sections]
+    )
+    short = short.sort_values(["section", "roll", "subject"])
+
+    return {
+        "semester": semester,
+        "as_of": upto,
+        "threshold": threshold,
+        "students": short["student_id"].nunique(),
+        "rows": short[SHORTAGE_COLUMNS],
+    }
+
+
+def shortage_args(args):
+    return (
+        int(args['section_id']) if args.get('section_id') else None,
+        float(args.get('below') or SHORTAGE_THRESHOLD),
+        parse_date(args['date']) if args.get('date') else None,
+    )
+
+
+@app.route('/shortage-report')
+@requires_role(login_redirect=True)
+@concurrency_class("export")
+def shortage_report():
+    report = None
+    try:
+        section_id, threshold, as_of = shortage_args(request.args)
+    except ValueError:
+        return "Invalid parameters", 400
+
+    if request.args:
+        # Department-wide lists are for admins; faculty see their sections
+        if not (principal().is_admin or section_id and principal().can_see_section(section_id)):
+            return "Access Denied", 403
+        report = build_shortage_report(get_db_connection(), section_id, threshold, as_of)
+
+    if session.get("role") == "faculty":
+        back_url = url_for("faculty_dashboard")
+    else:
+        back_url = url_for("admin_dashboard")
+
+    return render_template(
+        "shortage_report.html",
+        sections=ref_data().sections,
+        section_id=section_id,
+        threshold=threshold,
+        selected_date=request.args.get('date'),
+        report=report,
+        rows=report["rows"].itertuples(index=False) if report else [],
+        is_admin=principal().is_admin,
+        back_url=back_url
+    )
+
+
+# ================= EXPORT =================
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "2000"))
+
+
+# 🚚 Server-side cursor: rows arrive EXPORT_BATCH_SIZE at a time
+def stream_rows(query, params, name="export", conn=None):
+    cur = (conn or get_db_connection()).cursor(name=name)
+    cur.itersize = EXPORT_BATCH_SIZE
+    cur.execute(query, params)
+
+    try:
+        while True:
+            batch = cur.fetchmany(EXPORT_BATCH_SIZE)
+            if not batch:
+                break
+            yield from batch
+    finally:
+        cur.close()
+
+
+# 📄 Chunked CSV download, generated while the rows stream in
+def csv_response(header, rows, filename):
+    def generate():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(header)
+
+        for row in rows:
+            writer.writerow(row)
+            if buf.tell() > 64 * 1024:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+
+        yield buf.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+# 📗 openpyxl write-only workbook (rows are flushed to disk as they come)
+def write_xlsx(header, rows, output):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(header)
+
+    for row in rows:
+        ws.append(list(row))
+
+    wb.save(output)
+
+
+# 📚 header None = multi-sheet workbook; rows is then write(conn, output)
+def write_report(header, rows, conn, output):
+    if header is None:
+        rows(conn, output)
+    else:
+        write_xlsx(header, rows(conn), output)
+
+
+def xlsx_response(header, rows, filename):
+    output = tempfile.TemporaryFile()
+    write_report(header, rows, get_db_connection(), output)
+    size = output.seek(0, os.SEEK_END)
+    output.seek(0)
+
+    response = send_file(
+        output,
+        as_attachment=True,
+        download_name=filename,
+        mimetype=XLSX_MIMETYPE
+    )
+    # Lets cached_response skip workbooks too big to keep in memory
+    response.content_length = size
+    return response
+
+
+def export_response(header, rows, filename):
+    if header is not None and request.args.get('format') == 'csv':
+        return csv_response(header, rows(get_db_connection()), f"{filename}.csv")
+    return xlsx_response(header, rows, f"{filename}.xlsx")
+
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+# 📦 Report definitions, shared by the direct downloads and the report
+# queue. Each takes the request parameters and returns
+# (header, rows(conn), filename); ValueError/KeyError = bad parameters.
+#
+# 📅 One day's marks, optionally narrowed to a section / class / period /
+# status, or (admins) faculty; for faculty, faculty_id is forced to their
+# own by scoped_args. attendance is partitioned by month, so the date
+# filter keeps this to one partition.
+def attendance_export(args):
+    selected_date = args['date']
+    filters = {
+        "date": parse_date(selected_date),
+        "section": int(args['section_id']) if args.get('section_id') else None,
+        "schedule": int(args['schedule_id']) if args.get('schedule_id') else None,
+        "period": int(args['period_no']) if args.get('period_no') else None,
+        "faculty": int(args['faculty_id']) if args.get('faculty_id') else None,
+        "status": args.get('status') if args.get('status') in ('Present', 'Absent') else None,
+    }
+
+    def rows(conn):
+        return stream_rows("""
+            SELECT sec.section_name, cs.period_no, cs.subject, f.name,
+                   s.roll_no, s.name, a.status
+            FROM attendance a
+            JOIN students s        ON s.student_id = a.student_id
+            JOIN sections sec      ON sec.section_id = a.section_id
+            JOIN class_schedule cs ON cs.schedule_id = a.schedule_id
+            JOIN faculty f         ON f.faculty_id = a.faculty_id
+            WHERE a.date = %(date)s
+              AND (%(section)s::int IS NULL OR a.section_id = %(section)s)
+              AND (%(schedule)s::int IS NULL OR a.schedule_id = %(schedule)s)
+              AND (%(period)s::int IS NULL OR cs.period_no = %(period)s)
+              AND (%(faculty)s::int IS NULL OR a.faculty_id = %(faculty)s)
+              AND (%(status)s::text IS NULL OR a.status = %(status)s)
+            ORDER BY sec.section_name, cs.period_no, cs.subject, s.roll_no
+        """, filters, conn=conn)
+
+    ref = ref_data()
+    filename = f"Attendance_{selected_date}"
+    if filters["section"]:
+        filename += f"_{ref.section_name(filters['section'])}"
+    if filters["schedule"] and ref.schedule(filters["schedule"]):
+        filename += f"_{ref.schedule(filters['schedule']).subject}"
+    if filters["period"]:
+        filename += f"_P{filters['period']}"
+
+    header = ["Section", "Period", "Subject", "Faculty", "Roll No", "Name", "Status"]
+    return header, rows, filename.replace(" ", "_")
+
+
+def faculty_audit_export(args):
+    # 📅 Optional from / to
+    where = []
+    params = []
+
+    if args.get('from'):
+        where.append("cl.date >= %s")
+        params.append(parse_date(args['from']))
+    if args.get('to'):
+        where.append("cl.date <= %s")
+        params.append(parse_date(args['to']))
+
+    def rows(conn):
+        return stream_rows(f"""
+            SELECT DISTINCT
+                f_marker.name AS marked_by,
+                f_class.name  AS class_faculty,
+                s.section_name,
+                cl.date
+            FROM class_summary cl
+            JOIN faculty f_marker ON f_marker.faculty_id = cl.marked_by
+            JOIN faculty f_class  ON f_class.faculty_id  = cl.faculty_id
+            JOIN sections s       ON s.section_id = cl.section_id
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY cl.date DESC
+        """, tuple(params), conn=conn)
+
+    return ["Marked By", "Class Faculty", "Section", "Date"], rows, "Faculty_Attendance_Audit"
+
+
+def student_export(args):
+    student_id = int(args['student_id'])
+
+    # 📅 One day (?date=) or a range (?from=&to=[&subject=])
+    if args.get('from') and args.get('to'):
+        query, params = student_range_query(
+            student_id,
+            parse_date(args['from']),
+            parse_date(args['to']),
+            args.get('subject') or None
+        )
+        filename = f"Student_Attendance_{args['from']}_to_{args['to']}"
+    else:
+        report_date = parse_date(args['date'])
+        query, params = student_range_query(student_id, report_date, report_date)
+        filename = f"Student_Attendance_{args['date']}"
+
+    def rows(conn):
+        return (
+            (class_date.strftime("%d-%m-%Y"), period_no, subject, faculty, status)
+            for class_date, period_no, subject, faculty, status
+            in stream_rows(query, params, conn=conn)
+        )
+
+    return ["Date", "Period", "Subject", "Faculty", "Status"], rows, filename
+
+
+def shortage_export(args):
+    section_id, threshold, as_of = shortage_args(args)
+
+    def rows(conn):
+        report = build_shortage_report(conn, section_id, threshold, as_of)
+        if report is None:
+            return iter(())
+        return report["rows"].itertuples(index=False, name=None)
+
+    scope = ref_data().section_name(section_id) if section_id else "Department"
+    return SHORTAGE_HEADER, rows, f"Shortage_{scope}_{args.get('date') or date.today()}"
+
+
+# ================= DEPARTMENT WORKBOOK =================
+# One xlsx for the whole department: a Summary sheet plus one sheet per
+# section (students × classes held, "P" / "A", absences highlighted by
+# conditional formatting). Everything comes from one streamed query: per
+# section a header row with the class labels, then one row per student
+# with the column numbers they were present / absent in. Sheets are
+# write-only, so memory stays flat however many sections there are.
+WORKBOOK_SHEET_ROWS = int(os.environ.get("WORKBOOK_SHEET_ROWS", "1000"))
+
+WORKBOOK_SUMMARY_HEADER = [
+    "Section", "Students", "Classes Held", "Marks", "Absences",
+    "Attendance %", "Below Threshold", "Students Not Shown"
+]
+ABSENT_FILL = PatternFill("solid", start_color="FFC7CE", end_color="FFC7CE")
+SHORT_FILL = PatternFill("solid", start_color="FFEB9C", end_color="FFEB9C")
+
+
+# Highlight percentages under the threshold (blank = no classes, left alone)
+def shortage_rule(ws, column, first, last, threshold):
+    cell = f"{column}{first}"
+    ws.conditional_formatting.add(
+        f"{column}{first}:{column}{last}",
+        FormulaRule(formula=[f"AND(ISNUMBER({cell}),{cell}<{threshold})"], fill=SHORT_FILL)
+    )
+
+DEPARTMENT_WORKBOOK_SQL = """
+    WITH classes AS (
+        SELECT
+            cl.section_id,
+            cl.date,
+            cl.schedule_id,
+            cs.period_no,
+            row_number() OVER (
+                PARTITION BY cl.section_id
+                ORDER BY cl.date, cs.period_no, cl.schedule_id
+            ) - 1 AS col
+        FROM class_summary cl
+        JOIN class_schedule cs ON cs.schedule_id = cl.schedule_id
+        WHERE cl.date BETWEEN %(from)s AND %(to)s
+          AND (%(section)s::int IS NULL OR cl.section_id = %(section)s)
+    ),
+    marks AS (
+        SELECT
+            c.section_id,
+            a.student_id,
+            array_agg(c.col) FILTER (WHERE a.status = 'Present') AS present,
+            array_agg(c.col) FILTER (WHERE a.status <> 'Present') AS absent
+        FROM attendance a
+        JOIN classes c ON c.schedule_id = a.schedule_id AND c.date = a.date
+        WHERE a.date BETWEEN %(from)s AND %(to)s
+        GROUP BY c.section_id, a.student_id
+    )
+    SELECT sec.section_name, NULL, NULL,
+           (SELECT array_agg(to_char(c.date, 'DD-MM') || ' P' || c.period_no ORDER BY c.col)
+            FROM classes c
+            WHERE c.section_id = sec.section_id),
+           NULL, NULL
+    FROM sections sec
+    WHERE %(section)s::int IS NULL OR sec.section_id = %(section)s
+
+    UNION ALL
+
+    SELECT sec.section_name, s.roll_no, s.name, NULL, m.present, m.absent
+    FROM students s
+    JOIN sections sec ON sec.section_id = s.section_id
+    LEFT JOIN marks m ON m.student_id = s.student_id AND m.section_id = s.section_id
+    WHERE %(section)s::int IS NULL OR s.section_id = %(section)s
+
+    ORDER BY 1, 2 NULLS FIRST
+"""
+
+
+# 📄 One section's sheet; rows go straight to disk, only totals are kept
+class SectionSheet:
+
+    def __init__(self, wb, section_name, labels, threshold):
+        self.section_name = section_name
+        self.columns = len(labels)
+        self.threshold = threshold
+        self.students = self.marks = self.absences = self.below = self.dropped = 0
+
+        # Sheet titles: max 31 chars, none of []:*?/\
+        title = "".join("_" if ch in "[]:*?/\\" else ch for ch in section_name)[:31]
+        self.ws = wb.create_sheet(title)
+        self.ws.freeze_panes = "C2"
+        self.ws.append(["Roll No", "Name", *labels, "Held", "Attended", "%"])
+
+    def add(self, roll_no, name, present, absent):
+        self.students += 1
+        held = len(present) + len(absent)
+        self.marks += held
+        self.absences += len(absent)
+
+        percent = round((held - len(absent)) * 100.0 / held, 1) if held else None
+        if percent is not None and percent < self.threshold:
+            self.below += 1
+
+        if self.students > WORKBOOK_SHEET_ROWS:
+            self.dropped += 1
+            return
+
+        cells = [None] * self.columns
+        for col in present:
+            cells[col] = "P"
+        for col in absent:
+            cells[col] = "A"
+        self.ws.append([roll_no, name, *cells, held, held - len(absent), percent])
+
+    # Formatting is written after the rows, so it can be added last
+    def close(self):
+        last = min(self.students, WORKBOOK_SHEET_ROWS) + 1
+        if self.dropped:
+            self.ws.append([f"… {self.dropped} more students not shown (limit {WORKBOOK_SHEET_ROWS})"])
+
+        if last > 1 and self.columns:
+            self.ws.conditional_formatting.add(
+                f"C2:{get_column_letter(self.columns + 2)}{last}",
+                CellIsRule(operator="equal", formula=['"A"'], fill=ABSENT_FILL)
+            )
+        if last > 1:
+            shortage_rule(self.ws, get_column_letter(self.columns + 5), 2, last, self.threshold)
+
+        percent = round((self.marks - self.absences) * 100.0 / self.marks, 1) if self.marks else None
+        return [
+            self.section_name, self.students, self.columns, self.marks,
+            self.absences, percent, self.below, self.dropped
+        ]
+
+
+def write_department_workbook(rows, output, threshold):
+    wb = Workbook(write_only=True)
+    summary = wb.create_sheet("Summary")
+    summary.freeze_panes = "A2"
+    summary.append(WORKBOOK_SUMMARY_HEADER)
+
+    lines = []
+    sheet = None
+    for section_name, roll_no, name, labels, present, absent in rows:
+        if roll_no is not None:
+            sheet.add(roll_no, name, present or (), absent or ())
+            continue
+        # 🆕 Section header row: finish the previous sheet first
+        if sheet:
+            lines.append(sheet.close())
+        sheet = SectionSheet(wb, section_name, labels or [], threshold)
+    if sheet:
+        lines.append(sheet.close())
+
+    for line in lines:
+        summary.append(line)
+
+    students, held, marks, absences, below, dropped = (
+        sum(line[i] for line in lines) for i in (1, 2, 3, 4, 6, 7)
+    )
+    percent = round((marks - absences) * 100.0 / marks, 1) if marks else None
+    summary.append([])
+    summary.append(["Department", students, held, marks, absences, percent, below, dropped])
+    shortage_rule(summary, "F", 2, len(lines) + 3, threshold)
+
+    wb.save(output)
+
+
+def department_export(args):
+    today = date.today()
+    semester = ref_data().current_semester(today)
+
+    date_to = parse_date(args['to']) if args.get('to') else today
+    if args.get('from'):
+        date_from = parse_date(args['from'])
+    elif semester:
+        date_from = semester.start_date
+    else:
+        raise KeyError('from')
+
+    section_id = int(args['section_id']) if args.get('section_id') else None
+    threshold = float(args.get('threshold') or SHORTAGE_THRESHOLD)
+
+    def write(conn, output):
+        rows = stream_rows(DEPARTMENT_WORKBOOK_SQL, {
+            "from": date_from, "to": date_to, "section": section_id
+        }, name="department", conn=conn)
+        write_department_workbook(rows, output, threshold)
+
+    return None, write, f"Department_Attendance_{date_from}_to_{date_to}"
+
+
+REPORTS = {
+    "attendance": attendance_export,
+    "faculty-audit": faculty_audit_export,
+    "student": student_export,
+    "shortage": shortage_export,
+    "department": department_export,
+}
+ADMIN_REPORTS = {"faculty-audit", "department"}
+
+
+FACULTY_SCOPED_REPORTS = {"attendance"}
+
+
+# 🔐 Faculty exports cover only the classes they teach
+def scoped_args(kind, args):
+    args = dict(args)
+    if kind in FACULTY_SCOPED_REPORTS and not principal().is_admin:
+        args['faculty_id'] = principal().faculty_id
+    return args
+
+
+def report_allowed(kind, params):
+    if principal().is_admin:
+        return True
+    if kind in ADMIN_REPORTS:
+        return False
+    if kind in FACULTY_SCOPED_REPORTS:
+        return str(params.get('faculty_id')) == str(principal().faculty_id)
+    if kind == "shortage":
+        # Department-wide shortage lists are for admins
+        section_id = str(params.get('section_id') or "")
+        return section_id.isdigit() and principal().can_see_section(int(section_id))
+    return True
+
+
+@app.route('/download-excel')
+@requires_role()
+@concurrency_class("export")
+@cached_response
+def download_excel():
+    try:
+        report = attendance_export(scoped_args("attendance", request.args.to_dict()))
+    except (KeyError, ValueError):
+        return "Missing parameters", 400
+
+    return export_response(*report)
+
+
+@app.route('/download-faculty-report')
+@requires_role(*ADMIN_ROLES)
+@concurrency_class("export")
+def download_faculty_report():
+    try:
+        report = faculty_audit_export(request.args)
+    except (KeyError, ValueError):
+        return "Missing parameters", 400
+
+    return export_response(*report)
+
+
+@app.route('/download-student-excel')
+@concurrency_class("export")
+def download_student_excel():
+    try:
+        report = student_export(request.args)
+    except (KeyError, ValueError):
+        return "Missing parameters", 400
+
+    return export_response(*report)
+
+
+@app.route('/download-department-workbook')
+@requires_role(*ADMIN_ROLES)
+@concurrency_class("export")
+def download_department_workbook():
+    try:
+        report = department_export(request.args)
+    except (KeyError, ValueError):
+        return "Missing parameters", 400
+
+    return export_response(*report)
+
+
+@app.route('/download-shortage-report')
+@requires_role()
+@concurrency_class("export")
+def download_shortage_report():
+    if not report_allowed("shortage", request.args):
+        return "Access Denied", 403
+
+    try:
+        report = shortage_export(request.args)
+    except (KeyError, ValueError):
+        return "Missing parameters", 400
+
+    return export_response(*report)
+
+
+# ================= REPORT JOBS =================
+# Heavy workbooks are built off the request path. POST /reports/<kind>
+# queues a job (identical parameters share one job via job_key), worker
+# threads claim jobs from report_jobs with SKIP LOCKED, write the xlsx to
+# REPORT_DIR, and GET /reports/<id>[/download] polls and serves it.
+# REPORT_DIR must be shared by every process that serves these routes.
+# Worker threads in a web process pass the same gates as an export
+# request, so a building workbook never takes /save's reserved
+# connections. Set REPORT_WORKERS=0 on web processes to leave building
+# to `flask --app app report-worker`.
+REPORT_DIR = os.environ.get("REPORT_DIR", os.path.join(tempfile.gettempdir(), "attendance-reports"))
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", "1"))
+REPORT_TTL = float(os.environ.get("REPORT_TTL", "600"))              # reuse a finished file this long
+REPORT_JOB_TIMEOUT = float(os.environ.get("REPORT_JOB_TIMEOUT", "900"))
+REPORT_POLL = float(os.environ.get("REPORT_POLL", "2"))
+
+_report_wakeup = threading.Event()
+_report_workers_pid = None
+_report_workers_lock = threading.Lock()
+
+
+def report_key(kind, params):
+    raw = kind + json.dumps(params, sort_keys=True)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def report_path(job_key):
+    return os.path.join(REPORT_DIR, f"{job_key}.xlsx")
+
+
+def claim_report_job(conn):
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE report_jobs
+        SET status = 'running', started_at = now(), attempts = attempts + 1
+        WHERE job_id = (
+            SELECT job_id
+            FROM report_jobs
+            WHERE status = 'queued'
+               OR (status = 'running'
+                   AND started_at < now() - make_interval(secs => %s))
+            ORDER BY requested_at
+            FOR UPDATE SKIP LOCKED
+            LIMIT 1
+        )
+        RETURNING job_id, job_key, kind, params
+    """, (REPORT_JOB_TIMEOUT,))
+    job = cur.fetchone()
+    conn.commit()
+    cur.close()
+    return job
+
+
+def run_report_job(conn, job):
+    job_id, job_key, kind, params = job
+    cur = conn.cursor()
+
+    try:
+        header, rows, _ = REPORTS[kind](params)
+        os.makedirs(REPORT_DIR, exist_ok=True)
+
+        # Write next to the target, then swap in atomically
+        fd, tmp_path = tempfile.mkstemp(dir=REPORT_DIR, suffix=".part")
+        with os.fdopen(fd, "wb") as output:
+            write_report(header, rows, conn, output)
+        os.replace(tmp_path, report_path(job_key))
+        conn.rollback()
+
+        cur.execute("""
+            UPDATE report_jobs
+            SET status = 'done', finished_at = now(), error = NULL
+            WHERE job_id = %s
+        """, (job_id,))
+    except Exception as e:
+        conn.rollback()
+        app.logger.exception("report job %s failed", job_id)
+        cur.execute("""
+            UPDATE report_jobs
+            SET status = 'failed', finished_at = now(), error = %s
+            WHERE job_id = %s
+        """, (str(e)[:500], job_id))
+
+    conn.commit()
+    cur.close()
+
+
+def report_worker_loop(gates=()):
+    while True:
+        for gate in gates:
+            gate.acquire()
+        try:
+            # The context's connection, so builders and ref_data() reuse it
+            # instead of taking a second one outside the gates
+            with app.app_context():
+                conn = get_db_connection()
+                job = claim_report_job(conn)
+                if job:
+                    run_report_job(conn, job)
+                    continue
+        except Exception:
+            app.logger.exception("report worker error")
+        finally:
+            for gate in reversed(gates):
+                gate.release()
+
+        _report_wakeup.wait(REPORT_POLL)
+        _report_wakeup.clear()
+
+
+# 🧵 Start this process's worker threads once (again after a fork)
+def ensure_report_workers():
+    global _report_workers_pid
+
+    if REPORT_WORKERS <= 0 or _report_workers_pid == os.getpid():
+        return
+
+    with _report_workers_lock:
+        if _report_workers_pid == os.getpid():
+            return
+        for _ in range(REPORT_WORKERS):
+            threading.Thread(target=report_worker_loop, args=(GATES["export"],), daemon=True).start()
+        _report_workers_pid = os.getpid()
+
+
+def job_status(job_id, kind, status, error):
+    body = {"job_id": job_id, "kind": kind, "status": status, "error": error}
+    if status == "done":
+        body["download"] = url_for('download_report', job_id=job_id)
+    else:
+        body["poll"] = url_for('report_status', job_id=job_id)
+    return body
+
+
+@app.route('/reports/<kind>', methods=['POST'])
+@requires_role()
+def submit_report(kind):
+    if kind not in REPORTS:
+        return "Unknown report", 404
+
+    params = scoped_args(kind, {k: v for k, v in request.values.items() if k != 'format'})
+
+    if not report_allowed(kind, params):
+        return "Access Denied", 403
+
+    try:
+        REPORTS[kind](params)
+    except (KeyError, ValueError):
+        return "Missing parameters", 400
+
+    job_key = report_key(kind, params)
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    # 🔁 Same parameters → same job, unless it failed or its file is stale
+    cur.execute("""
+        INSERT INTO report_jobs (job_key, kind, params, requested_by)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (job_key) DO UPDATE SET
+            status = 'queued',
+            requested_at = now(),
+            requested_by = EXCLUDED.requested_by,
+            started_at = NULL,
+            finished_at = NULL,
+            error = NULL
+        WHERE report_jobs.status = 'failed'
+           OR (report_jobs.status = 'done'
+               AND report_jobs.finished_at < now() - make_interval(secs => %s))
+        RETURNING job_id, status, error
+    """, (job_key, kind, json.dumps(params), session['faculty_id'], REPORT_TTL))
+    row = cur.fetchone()
+
+    if row is None:
+        cur.execute("""
+            SELECT job_id, status, error
+            FROM report_jobs
+            WHERE job_key = %s
+        """, (job_key,))
+        row = cur.fetchone()
+
+    conn.commit()
+    cur.close()
+
+    ensure_report_workers()
+    _report_wakeup.set()
+
+    job_id, status, error = row
+    return job_status(job_id, kind, status, error), 202
+
+
+def load_report_job(job_id):
+    cur = get_db_connection().cursor()
+    cur.execute("""
+        SELECT job_id, job_key, kind, params, status, error
+        FROM report_jobs
+        WHERE job_id = %s
+    """, (job_id,))
+    job = cur.fetchone()
+    cur.close()
+    return job
+
+
+@app.route('/reports/<int:job_id>')
+@requires_role()
+def report_status(job_id):
+    job = load_report_job(job_id)
+    if not job:
+        return "Unknown report", 404
+
+    _, job_key, kind, params, status, error = job
+
+    if not report_allowed(kind, params):
+        return "Access Denied", 403
+
+    # 🧹 File cleaned up (or built on another machine) → build it again
+    if status == "done" and not os.path.exists(report_path(job_key)):
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE report_jobs
+            SET status = 'queued', requested_at = now(), finished_at = NULL
+            WHERE job_id = %s AND status = 'done'
+        """, (job_id,))
+        conn.commit()
+        cur.close()
+        status = "queued"
+        ensure_report_workers()
+        _report_wakeup.set()
+
+    return job_status(job_id, kind, status, error)
+
+
+@app.route('/reports/<int:job_id>/download')
+@requires_role()
+def download_report(job_id):
+    job = load_report_job(job_id)
+    if not job:
+        return "Unknown report", 404
+
+    _, job_key, kind, params, status, _ = job
+
+    if not report_allowed(kind, params):
+        return "Access Denied", 403
+
+    path = report_path(job_key)
+    if status != "done" or not os.path.exists(path):
+        return "Report not ready", 409
+
+    _, _, filename = REPORTS[kind](params)
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=f"{filename}.xlsx",
+        mimetype=XLSX_MIMETYPE
+    )
+
+
+@app.route('/faculty-dashboard')
+@requires_role('faculty')
+def faculty_dashboard():
+    ref = ref_data()
+
+    faculty_id = session['faculty_id']
+    section_id = int(session['section_id'])
+
+    # Faculty name
+    faculty_name = principal().name
+
+    # Section name
+    section_name = ref.section_name(section_id)
+
+    # Today's day
+    today = date.today()
+    today_day = today.strftime("%A")
+
+    # Today's classes
+    today_classes = [
+        {
+            "schedule_id": s.schedule_id,
+            "subject": s.subject,
+            "period_no": s.period_no
+        }
+        for s in ref.schedules_for(faculty_id, section_id, today_day)
+    ]
+
+    return render_template(
+        "faculty_dashboard.html",
+        faculty_name=faculty_name,
+        section_name=section_name,
+        faculty_id=faculty_id,
+        section_id=section_id,
+        today=today.strftime("%d-%m-%Y"),
+        today_classes=today_classes
+    )
+
+
+# 📋 Reads class_summary: one row per class held that day
+DAILY_SUMMARY_SQL = """
+    SELECT
+        f.name AS faculty_name,
+        cs.subject,
+        s.section_name,
+        SUM(cl.present) AS present_count,
+        SUM(cl.absent) AS absent_count
+    FROM class_summary cl
+    JOIN faculty f ON f.faculty_id = cl.faculty_id
+    JOIN sections s ON s.section_id = cl.section_id
+    JOIN class_schedule cs
+      ON cs.schedule_id = cl.schedule_id
+    WHERE cl.date = %s
+    GROUP BY f.name, cs.subject, s.section_name
+    ORDER BY s.section_name, f.name
+"""
+
+
+@app.route('/daily-summary')
+@requires_role(login_redirect=True)
+@cached_response
+def daily_summary():
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    selected_date = request.args.get('date')
+    summary = []
+
+    if selected_date:
+        report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
+
+        cur.execute(DAILY_SUMMARY_SQL, (report_date,))
+
+        rows = cur.fetchall()
+
+        summary = [
+            {
+                "faculty": r[0],
+                "subject": r[1],
+                "section": r[2],
+                "present": r[3],
+                "absent": r[4]
+            }
+            for r in rows
+        ]
+
+    cur.close()
+
+    # Role-based back button
+    if session.get("role") == "faculty":
+        back_url = url_for("faculty_dashboard")
+    else:
+        back_url = url_for("admin_dashboard")
+
+    return render_template(
+        "daily_summary.html",
+        summary=summary,
+        selected_date=selected_date,
+        back_url=back_url
+    )
+
+@app.route('/load-schedule')
+@requires_role(login_redirect=True)
+def load_schedule():
+    selected_date = request.args.get('date')
+    if not selected_date:
+        return redirect(url_for('faculty_dashboard'))
+
+    report_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
+    day_name = report_date.strftime("%A")
+
+    rows = ref_data().schedules_for(
+        session['faculty_id'],
+        int(session['section_id']),
+        day_name
+    )
+
+    schedules = [
+        {
+            "schedule_id": s.schedule_id,
+            "subject": s.subject,
+            "period_no": s.period_no
+        }
+        for s in rows
+    ]
+
+    return render_template(
+        "select_schedule.html",
+        schedules=schedules,
+        selected_date=selected_date
+    )
+
+# 📝 Mark one or more classes: schedule lookup, roster, attendance upsert
+# and rollup / class_summary / bitmap maintenance in a single round trip. Classes
+# arrive as parallel arrays (absentees flattened to (class index, student)
+# pairs) and must be unique per (schedule_id, date). The advisory locks,
+# taken in array order, serialise re-submissions of the same class so the
+# deltas (computed against the rows as they were before this statement)
+# never double count. class_summary.last_updated is when the marks were
+# taken, on the server's clock: now() for /save, the skew-corrected
+# device time for an outbox submission. Returns the number of classes
+# whose schedule exists.
+SAVE_ATTENDANCE_SQL = """
+    SELECT pg_advisory_xact_lock(k.schedule_id, k.day)
+    FROM unnest(%(schedule_ids)s::int[], %(days)s::int[]) AS k(schedule_id, day);
+
+    WITH sub AS (
+        SELECT *
+        FROM unnest(%(schedule_ids)s::int[], %(dates)s::date[], %(week_ids)s::int[],
+                    %(marked_at)s::timestamptz[])
+             WITH ORDINALITY AS t(schedule_id, date, week_id, marked_at, idx)
+    ),
+    absent AS (
+        SELECT *
+        FROM unnest(%(absent_idx)s::int[], %(absent_ids)s::int[]) AS x(idx, student_id)
+    ),
+    cs AS (
+        SELECT sub.idx, sub.date, sub.week_id, sub.marked_at,
+               c.schedule_id, c.faculty_id, c.section_id, c.group_id
+        FROM sub
+        JOIN class_schedule c ON c.schedule_id = sub.schedule_id
+    ),
+    prev AS (
+        SELECT a.student_id, a.schedule_id, a.date, a.status
+        FROM attendance a
+        JOIN sub
+          ON a.schedule_id = sub.schedule_id
+         AND a.date = sub.date
+    ),
+    ins AS (
+        INSERT INTO attendance
+        (student_id, faculty_id, section_id, schedule_id,
+         week_id, date, status, marked_by)
+        SELECT
+            st.student_id,
+            cs.faculty_id,
+            cs.section_id,
+            cs.schedule_id,
+            cs.week_id,
+            cs.date,
+            CASE WHEN EXISTS (
+                SELECT 1 FROM absent
+                WHERE absent.idx = cs.idx AND absent.student_id = st.student_id
+            ) THEN 'Absent' ELSE 'Present' END,
+            %(marked_by)s
+        FROM cs
+        JOIN students st
+          ON st.section_id = cs.section_id
+         AND (COALESCE(cs.group_id, 0) = 0 OR st.group_id = cs.group_id)
+        ON CONFLICT (student_id, schedule_id, date)
+        DO UPDATE SET
+            status = EXCLUDED.status,
+            marked_by = EXCLUDED.marked_by
+        RETURNING student_id, schedule_id, date, status
+    ),
+    delta AS (
+        SELECT
+            ins.student_id,
+            ins.schedule_id,
+            ins.date,
+            (ins.status = 'Present')::int - COALESCE((prev.status = 'Present')::int, 0) AS present,
+            (ins.status = 'Absent')::int - COALESCE((prev.status = 'Absent')::int, 0) AS absent
+        FROM ins
+        LEFT JOIN prev
+          ON prev.student_id = ins.student_id
+         AND prev.schedule_id = ins.schedule_id
+         AND prev.date = ins.date
+        WHERE prev.status IS DISTINCT FROM ins.status
+    ),
+    rollup AS (
+        INSERT INTO attendance_rollup
+        (student_id, schedule_id, present, absent, last_date)
+        SELECT student_id, schedule_id, SUM(present), SUM(absent), MAX(date)
+        FROM delta
+        GROUP BY student_id, schedule_id
+        ON CONFLICT (student_id, schedule_id)
+        DO UPDATE SET
+            present = attendance_rollup.present + EXCLUDED.present,
+            absent = attendance_rollup.absent + EXCLUDED.absent,
+            last_date = GREATEST(attendance_rollup.last_date, EXCLUDED.last_date)
+    ),
+    summary AS (
+        INSERT INTO class_summary
+        (date, schedule_id, faculty_id, section_id, present, absent, marked_by, last_updated)
+        SELECT
+            cs.date,
+            cs.schedule_id,
+            cs.faculty_id,
+            cs.section_id,
+            COALESCE(SUM(delta.present), 0),
+            COALESCE(SUM(delta.absent), 0),
+            %(marked_by)s,
+            COALESCE(cs.marked_at, now())
+        FROM cs
+        LEFT JOIN delta
+          ON delta.schedule_id = cs.schedule_id
+         AND delta.date = cs.date
+        GROUP BY cs.date, cs.schedule_id, cs.faculty_id, cs.section_id, cs.marked_at
+        ON CONFLICT (date, schedule_id)
+        DO UPDATE SET
+            present = class_summary.present + EXCLUDED.present,
+            absent = class_summary.absent + EXCLUDED.absent,
+            marked_by = EXCLUDED.marked_by,
+            last_updated = EXCLUDED.last_updated,
+            revision = nextval('class_summary_revision_seq')
+    ),
+    marks AS (
+        SELECT student_id, schedule_id, date, status FROM ins
+    ),
+""" + BITMAP_CTES + """
+    SELECT COUNT(*) FROM cs;
+"""
+
+
+# classes: [(schedule_id, class_date, week_id, absent_ids, marked_at)],
+# marked_at None = now
+def upsert_attendance(cur, classes, marked_by):
+    classes = sorted(classes, key=lambda c: (c[0], c[1]))
+
+    cur.execute(SAVE_ATTENDANCE_SQL, {
+        "schedule_ids": [c[0] for c in classes],
+        "days": [c[1].toordinal() for c in classes],
+        "dates": [c[1] for c in classes],
+        "week_ids": [c[2] for c in classes],
+        "marked_at": [c[4] for c in classes],
+        "absent_idx": [i for i, c in enumerate(classes, 1) for _ in c[3]],
+        "absent_ids": [sid for c in classes for sid in c[3]],
+        "marked_by": marked_by
+    })
+    return cur.fetchone()[0]
+
+
+# 📅 week_id for a class date, or the reason it cannot be marked
+def class_week(class_date):
+    semester = ref_data().semester_for(class_date)
+
+    if not semester:
+        return None, "Date is outside the semester"
+
+    if semester.holiday(class_date):
+        return None, f"Holiday: {semester.holiday(class_date)}"
+
+    return semester.week_of(class_date), None
+
+
+@app.route('/save', methods=['POST'])
+@requires_role('faculty')
+@concurrency_class("save")
+def save():
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    schedule_id = int(request.form['schedule_id'])
+    attendance_date = request.form['attendance_date']
+
+    # Convert YYYY-MM-DD → date
+    class_date = datetime.strptime(attendance_date, "%Y-%m-%d").date()
+
+    # 🔢 week_id from the semester calendar
+    week_id, error = class_week(class_date)
+
+    if error:
+        return error, 400
+
+    # ❌ Checked boxes are the absentees
+    absent_ids = [
+        int(key[4:]) for key in request.form
+        if key.startswith("att_") and key[4:].isdigit()
+    ]
+
+    # 📝 Schedule lookup, student list and upsert in one round trip
+    schedule_found = upsert_attendance(
+        cur, [(schedule_id, class_date, week_id, absent_ids, None)], session['faculty_id']
+    )
+
+    if not schedule_found:
+        conn.rollback()
+        return "Invalid schedule", 400
+
+    conn.commit()
+    cur.close()
+
+    # Redirect to report of that date
+    return redirect(url_for(
+        'week_report',
+        schedule_id=schedule_id,
+        date=class_date.strftime("%Y-%m-%d")
+    ))
+
+
+# 📶 Offline outbox sync. The attendance page queues submissions in
+# IndexedDB (via the service worker) and posts them here in batches:
+#   {"sent_ts", "submissions": [{"key", "schedule_id", "date", "absent": [ids], "client_ts"}]}
+# client_ts and sent_ts (when the batch was posted) are on the device's
+# clock; client_ts + (arrival - sent_ts) puts a submission on the
+# server's, where it can be compared with /save writes. Keys already seen
+# are "duplicate"; a submission taken before the class's last write (its
+# class_summary.last_updated), or before a later one for the same class
+# in this batch, is "stale"; the rest are "applied" together in one
+# transaction. "rejected" ones will never apply and should be dropped by
+# the client.
+SYNC_MAX_SUBMISSIONS = int(os.environ.get("SYNC_MAX_SUBMISSIONS", "100"))
+
+
+def parse_client_ts(value):
+    if not value:
+        return None
+    # JS toISOString() → "...Z"; no offset means UTC
+    ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+@app.route('/sync-attendance', methods=['POST'])
+@requires_role('faculty')
+@concurrency_class("save")
+def sync_attendance():
+    arrived = datetime.now(timezone.utc)
+    payload = request.get_json(silent=True)
+    submissions = payload.get("submissions") if isinstance(payload, dict) else None
+
+    if not isinstance(submissions, list):
+        return {"error": 'Expected {"submissions": [...]}'}, 400
+
+    # Device clock → server clock; clients that omit sent_ts are trusted
+    try:
+        sent_ts = parse_client_ts(payload.get("sent_ts"))
+    except (AttributeError, TypeError, ValueError):
+        return {"error": "Malformed sent_ts"}, 400
+    skew = arrived - sent_ts if sent_ts else timedelta(0)
+
+    if len(submissions) > SYNC_MAX_SUBMISSIONS:
+        return {"error": f"At most {SYNC_MAX_SUBMISSIONS} submissions per sync"}, 413
+
+    results = {}
+    unkeyed = []    # rejected before a key could be read, by position
+    latest = {}     # (schedule_id, date) -> newest valid submission
+
+    for index, sub in enumerate(submissions):
+        key = sub.get("key") if isinstance(sub, dict) else None
+        if not isinstance(key, str) or not key:
+            unkeyed.append({"index": index, "status": "rejected", "error": "Malformed submission"})
+            continue
+        if key in results:
+            continue
+
+        try:
+            schedule_id = int(sub["schedule_id"])
+            class_date = datetime.strptime(sub["date"], "%Y-%m-%d").date()
+            absent = sub.get("absent", [])
+            # Student ids only: a string would iterate per character
+            if not isinstance(absent, list) or any(type(sid) is not int for sid in absent):
+                raise TypeError("absent must be a list of student ids")
+            absent_ids = sorted(set(absent))
+            client_ts = parse_client_ts(sub.get("client_ts"))
+        except (AttributeError, KeyError, TypeError, ValueError):
+            results[key] = {"status": "rejected", "error": "Malformed submission"}
+            continue
+
+        week_id, error = class_week(class_date)
+        if not error and not ref_data().schedule(schedule_id):
+            error = "Invalid schedule"
+
+        if error:
+            results[key] = {"status": "rejected", "error": error}
+            continue
+
+        # Never later than its arrival, whatever the device clock says
+        marked_at = min(client_ts + skew, arrived) if client_ts else arrived
+
+        results[key] = {"status": "stale"}
+        entry = (client_ts, key, schedule_id, class_date, week_id, absent_ids, marked_at)
+        # Newest client_ts wins; without timestamps, the later entry does
+        current = latest.get((schedule_id, class_date))
+        if current is None or not (client_ts and current[0]) or client_ts >= current[0]:
+            latest[(schedule_id, class_date)] = entry
+
+    # Lock order must match upsert_attendance's
+    valid = sorted(latest.values(), key=lambda v: (v[2], v[3]))
+
+    if valid:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        # 🔑 Take /save's per-class locks first, so a concurrent /save or
+        # sync of the same class cannot land between the stale check and
+        # the upsert, then claim the idempotency keys; a submission taken
+        # before the class's last write is stale
+        cur.execute("""
+            SELECT pg_advisory_xact_lock(k.schedule_id, k.day)
+            FROM unnest(%(schedule_ids)s::int[], %(days)s::int[]) AS k(schedule_id, day);
+
+            INSERT INTO attendance_sync
+            (idempotency_key, faculty_id, schedule_id, date, client_ts, status)
+            SELECT
+                t.key,
+                %(faculty_id)s,
+                t.schedule_id,
+                t.date,
+                t.client_ts,
+                CASE WHEN cl.last_updated > t.marked_at THEN 'stale' ELSE 'applied' END
+            FROM unnest(%(keys)s::text[], %(schedule_ids)s::int[], %(dates)s::date[],
+                        %(client_ts)s::timestamptz[], %(marked_at)s::timestamptz[])
+                 AS t(key, schedule_id, date, client_ts, marked_at)
+            LEFT JOIN class_summary cl
+              ON cl.date = t.date
+             AND cl.schedule_id = t.schedule_id
+            ON CONFLICT (idempotency_key) DO NOTHING
+            RETURNING idempotency_key, status
+        """, {
+            "faculty_id": session['faculty_id'],
+            "keys": [v[1] for v in valid],
+            "schedule_ids": [v[2] for v in valid],
+            "days": [v[3].toordinal() for v in valid],
+            "dates": [v[3] for v in valid],
+            "client_ts": [v[0] for v in valid],
+            "marked_at": [v[6] for v in valid],
+        })
+        claimed = dict(cur.fetchall())
+
+        for v in valid:
+            results[v[1]] = {"status": claimed.get(v[1], "duplicate")}
+
+        apply = [v[2:] for v in valid if claimed.get(v[1]) == "applied"]
+        if apply:
+            upsert_attendance(cur, apply, session['faculty_id'])
+
+        conn.commit()
+        cur.close()
+
+    return {"results": [{"key": k, **r} for k, r in results.items()] + unkeyed}
+
+
+@app.route('/sw.js')
+@concurrency_class("none")
+def service_worker():
+    response = app.make_response(render_template("sw.js"))
+    response.mimetype = "application/javascript"
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.route('/logout')
+@concurrency_class("none")
+def logout():
+    session.clear()
+    return redirect(url_for('index'))
+
+
+# ================= BULK IMPORT =================
+# Student rosters and timetables from CSV / xlsx, for semester start.
+# The file is validated as a whole with pandas (no per-row Python), then
+# COPYed into a temp staging table and merged with one statement that
+# also returns the diff. Students are matched on roll_no, timetable rows
+# on their slot (section, day, period, group). Nothing is deleted: rows
+# missing from the file are only counted in the report.
+IMPORT_MAX_ERRORS = 200
+
+IMPORT_COLUMNS = {
+    "students": ["roll_no", "name", "section", "group"],
+    "timetable": ["section", "subject", "faculty_id", "day_of_week", "period_no", "group"],
+}
+IMPORT_OPTIONAL = {"group"}
+IMPORT_ALIASES = {
+    "roll": "roll_no",
+    "section_name": "section",
+    "group_id": "group",
+    "day": "day_of_week",
+    "period": "period_no",
+    "faculty": "faculty_id",
+}
+
+
+class ImportFileError(ValueError):
+    pass
+
+
+def read_import_file(stream, filename):
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        df = pd.read_excel(stream, dtype=str, keep_default_na=False, engine="openpyxl")
+    else:
+        df = pd.read_csv(stream, dtype=str, keep_default_na=False)
+
+    df.columns = [
+        IMPORT_ALIASES.get(c, c)
+        for c in (str(c).strip().lower().replace(" ", "_") for c in df.columns)
+    ]
+    return df.apply(lambda col: col.str.strip())
+
+
+def import_errors(df, mask, message):
+    return [{"row": int(i) + 2, "error": message} for i in df.index[mask]]
+
+
+# Digits only → Int64 column (NA where blank or invalid) and the valid mask
+def int_column(series):
+    valid = series.str.fullmatch(r"\d+")
+    return pd.to_numeric(series.where(valid)).astype("Int64"), valid
+
+
+# Shared checks; returns (frame with section_id / group_id, errors)
+def validate_common(df, kind, ref):
+    missing = [c for c in IMPORT_COLUMNS[kind] if c not in df.columns and c not in IMPORT_OPTIONAL]
+    if missing:
+        raise ImportFileError(f"Missing column(s): {', '.join(missing)}")
+    if "group" not in df.columns:
+        df["group"] = ""
+
+    errors = []
+    for column in IMPORT_COLUMNS[kind]:
+        if column not in IMPORT_OPTIONAL:
+            errors += import_errors(df, df[column] == "", f"{column} is empty")
+
+    section_ids = {s.section_name: s.section_id for s in ref.sections}
+    df["section_id"] = df["section"].map(section_ids).astype("Int64")
+    errors += import_errors(df, df["section_id"].isna() & (df["section"] != ""), "Unknown section")
+
+    df["group_id"], valid = int_column(df["group"])
+    errors += import_errors(df, ~valid & (df["group"] != ""), "group must be a number")
+
+    return df, errors
+
+
+def validate_students(df, ref):
+    df, errors = validate_common(df, "students", ref)
+
+    dup = df["roll_no"].duplicated(keep=False) & (df["roll_no"] != "")
+    errors += import_errors(df, dup, "Duplicate roll number")
+
+    return df, errors
+
+
+def validate_timetable(df, ref):
+    df, errors = validate_common(df, "timetable", ref)
+
+    df["faculty_id"], _ = int_column(df["faculty_id"])
+    errors += import_errors(df, ~df["faculty_id"].isin(list(ref.faculty_by_id)), "Unknown faculty_id")
+
+    df["day_of_week"] = df["day_of_week"].str.title()
+    errors += import_errors(df, ~df["day_of_week"].isin(DAYS), "Unknown day_of_week")
+
+    df["period_no"], valid = int_column(df["period_no"])
+    errors += import_errors(df, ~valid | (df["period_no"] == 0).fillna(False), "period_no must be a positive number")
+
+    # 🕒 One row per slot; a whole-section class leaves no room for groups
+    slot = ["section_id", "day_of_week", "period_no"]
+    group_key = df["group_id"].fillna(0)
+    errors += import_errors(
+        df, df.assign(g=group_key).duplicated(slot + ["g"], keep=False),
+        "Slot listed twice"
+    )
+    whole = df[df["group_id"].isna()].groupby(slot).size()
+    per_slot = df.groupby(slot)["subject"].transform("size")
+    in_whole = df.set_index(slot).index.isin(whole.index)
+    errors += import_errors(df, in_whole & (per_slot > 1).to_numpy(), "Whole-section class clashes with a group class")
+
+    # 👩‍🏫 A faculty member cannot be in two places at once, including
+    # stored classes the import keeps: every slot not replaced by a row
+    # of this file (nothing is deleted)
+    in_file = set(zip(df["section_id"], df["day_of_week"], df["period_no"], group_key))
+    others = pd.DataFrame(
+        [(s.faculty_id, s.day_of_week, s.period_no)
+         for s in ref.schedules.values()
+         if (s.section_id, s.day_of_week, s.period_no, s.group_id or 0) not in in_file],
+        columns=["faculty_id", "day_of_week", "period_no"]
+    )
+    busy = pd.concat([df[["faculty_id", "day_of_week", "period_no"]], others], ignore_index=True)
+    clash = busy.duplicated(keep=False).to_numpy()[:len(df)] & df["faculty_id"].notna().to_numpy()
+    errors += import_errors(df, clash, "Faculty already teaching in this slot")
+
+    return df, errors
+
+
+STUDENTS_MERGE_SQL = """
+    WITH cur AS (
+        SELECT DISTINCT ON (roll_no) student_id, roll_no, name, section_id, group_id
+        FROM students
+        WHERE roll_no IN (SELECT roll_no FROM import_rows)
+        ORDER BY roll_no, student_id
+    ),
+    upd AS (
+        UPDATE students s
+        SET name = i.name, section_id = i.section_id, group_id = i.group_id
+        FROM import_rows i
+        JOIN cur ON cur.roll_no = i.roll_no
+        WHERE s.student_id = cur.student_id
+          AND (s.name, s.section_id, s.group_id)
+              IS DISTINCT FROM (i.name, i.section_id, i.group_id)
+        RETURNING s.student_id
+    ),
+    ins AS (
+        INSERT INTO students (roll_no, name, section_id, group_id)
+        SELECT i.roll_no, i.name, i.section_id, i.group_id
+        FROM import_rows i
+        WHERE NOT EXISTS (SELECT 1 FROM cur WHERE cur.roll_no = i.roll_no)
+        RETURNING student_id
+    )
+    SELECT
+        CASE WHEN cur.student_id IS NULL THEN 'added'
+             WHEN upd.student_id IS NOT NULL THEN 'updated'
+             ELSE 'unchanged' END,
+        i.roll_no,
+        concat_ws(' / ', cur.name, cur.section_id, cur.group_id),
+        concat_ws(' / ', i.name, i.section_id, i.group_id)
+    FROM import_rows i
+    LEFT JOIN cur ON cur.roll_no = i.roll_no
+    LEFT JOIN upd ON upd.student_id = cur.student_id
+    ORDER BY i.roll_no
+"""
+
+TIMETABLE_MERGE_SQL = """
+    WITH cur AS (
+        SELECT DISTINCT ON (section_id, day_of_week, period_no, COALESCE(group_id, 0))
+            schedule_id, section_id, day_of_week, period_no, group_id, faculty_id, subject
+        FROM class_schedule
+        WHERE section_id IN (SELECT section_id FROM import_rows)
+        ORDER BY section_id, day_of_week, period_no, COALESCE(group_id, 0), schedule_id
+    ),
+    matched AS (
+        SELECT i.*, cur.schedule_id, cur.faculty_id AS old_faculty_id, cur.subject AS old_subject
+        FROM import_rows i
+        LEFT JOIN cur
+          ON cur.section_id = i.section_id
+         AND cur.day_of_week = i.day_of_week
+         AND cur.period_no = i.period_no
+         AND COALESCE(cur.group_id, 0) = COALESCE(i.group_id, 0)
+    ),
+    upd AS (
+        UPDATE class_schedule c
+        SET faculty_id = m.faculty_id, subject = m.subject
+        FROM matched m
+        WHERE c.schedule_id = m.schedule_id
+          AND (c.faculty_id, c.subject) IS DISTINCT FROM (m.faculty_id, m.subject)
+        RETURNING c.schedule_id
+    ),
+    ins AS (
+        INSERT INTO class_schedule
+        (faculty_id, section_id, subject, group_id, day_of_week, period_no)
+        SELECT faculty_id, section_id, subject, group_id, day_of_week, period_no
+        FROM matched
+        WHERE schedule_id IS NULL
+        RETURNING schedule_id
+    )
+    SELECT
+        CASE WHEN m.schedule_id IS NULL THEN 'added'
+             WHEN upd.schedule_id IS NOT NULL THEN 'updated'
+             ELSE 'unchanged' END,
+        concat_ws(' ', m.section_id, m.day_of_week, 'P' || m.period_no, 'G' || m.group_id),
+        concat_ws(' / ', m.old_subject, m.old_faculty_id),
+        concat_ws(' / ', m.subject, m.faculty_id)
+    FROM matched m
+    LEFT JOIN upd ON upd.schedule_id = m.schedule_id
+    ORDER BY m.section_id, m.day_of_week, m.period_no, m.group_id
+"""
+
+IMPORT_TARGETS = {
+    # kind: (table, staging columns, staging DDL, merge, rows not in the file)
+    "students": (
+        "students",
+        ["roll_no", "name", "section_id", "group_id"],
+        "roll_no TEXT, name TEXT, section_id INT, group_id INT",
+        STUDENTS_MERGE_SQL,
+        """
+            SELECT COUNT(*) FROM students s
+            WHERE s.section_id IN (SELECT section_id FROM import_rows)
+              AND NOT EXISTS (SELECT 1 FROM import_rows i WHERE i.roll_no = s.roll_no)
+        """,
+    ),
+    "timetable": (
+        "class_schedule",
+        ["section_id", "subject", "faculty_id", "day_of_week", "period_no", "group_id"],
+        "section_id INT, subject TEXT, faculty_id INT, day_of_week TEXT, period_no INT, group_id INT",
+        TIMETABLE_MERGE_SQL,
+        """
+            SELECT COUNT(*) FROM class_schedule c
+            WHERE c.section_id IN (SELECT section_id FROM import_rows)
+              AND NOT EXISTS (
+                  SELECT 1 FROM import_rows i
+                  WHERE i.section_id = c.section_id
+                    AND i.day_of_week = c.day_of_week
+                    AND i.period_no = c.period_no
+                    AND COALESCE(i.group_id, 0) = COALESCE(c.group_id, 0)
+              )
+        """,
+    ),
+}
+IMPORT_VALIDATORS = {"students": validate_students, "timetable": validate_timetable}
+
+
+# 📥 Validate, stage and merge one file. With dry_run the merge runs and
+# is rolled back, so the diff is exactly what a real import would do.
+def run_import(conn, kind, df, dry_run=False):
+    started = time.perf_counter()
+    df, errors = IMPORT_VALIDATORS[kind](df, ref_data())
+    report = {
+        "kind": kind,
+        "rows": len(df),
+        "errors": sorted(errors, key=lambda e: e["row"])[:IMPORT_MAX_ERRORS],
+        "error_count": len(errors),
+        "dry_run": dry_run,
+        "counts": {},
+        "changes": [],
+        "not_in_file": 0,
+    }
+    if errors or df.empty:
+        return report
+
+    table, columns, ddl, merge_sql, missing_sql = IMPORT_TARGETS[kind]
+
+    buf = io.StringIO()
+    df[columns].to_csv(buf, index=False, header=False)
+    buf.seek(0)
+
+    cur = conn.cursor()
+    cur.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+    cur.execute(f"CREATE TEMP TABLE import_rows ({ddl}) ON COMMIT DROP")
+    cur.copy_expert(f"COPY import_rows ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+    cur.execute(merge_sql)
+    diff = cur.fetchall()
+    cur.execute(missing_sql)
+    report["not_in_file"] = cur.fetchone()[0]
+    cur.close()
+
+    if dry_run:
+        conn.rollback()
+    else:
+        conn.commit()
+        reference_cache.invalidate()
+
+    for d in diff:
+        report["counts"][d[0]] = report["counts"].get(d[0], 0) + 1
+    report["changes"] = [
+        {"action": action, "key": key, "before": before, "after": after}
+        for action, key, before, after in diff
+        if action != "unchanged"
+    ]
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    return report
+
+
+@app.route('/admin/import', methods=['GET', 'POST'])
+@requires_role(*ADMIN_ROLES)
+@concurrency_class("export")
+def admin_import():
+    report = None
+    error = None
+
+    if request.method == 'POST':
+        kind = request.form.get('kind')
+        upload = request.files.get('file')
+
+        if kind not in IMPORT_VALIDATORS or not upload or not upload.filename:
+            error = "Choose what to import and a CSV / xlsx file"
+        else:
+            try:
+                df = read_import_file(upload.stream, upload.filename)
+                report = run_import(
+                    get_db_connection(), kind, df,
+                    dry_run=bool(request.form.get('dry_run'))
+                )
+            except ValueError as e:
+                error = str(e)
+
+    return render_template("import.html", report=report, error=error)
+
+
+# ================= CLI =================
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+# 🗄️ flask --app app migrate → apply migrations/*.sql not yet recorded
+@app.cli.command("migrate")
+def migrate():
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name       TEXT PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        cur.execute("SELECT name FROM schema_migrations")
+        applied = {r[0] for r in cur.fetchall()}
+        conn.commit()
+
+        for name in sorted(os.listdir(MIGRATIONS_DIR)):
+            if not name.endswith(".sql") or name in applied:
+                continue
+
+            with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+                sql = f.read()
+
+            # CREATE INDEX CONCURRENTLY etc. cannot run inside a transaction
+            if sql.startswith("-- no-transaction"):
+                conn.autocommit = True
+                for statement in sql.split(";\n"):
+                    if statement.strip():
+                        cur.execute(statement)
+                conn.autocommit = False
+            else:
+                cur.execute(sql)
+
+            cur.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+            conn.commit()
+            click.echo(f"applied {name}")
+
+        cur.close()
+
+
+# 📦 flask --app app report-worker → build queued reports in this process
+@app.cli.command("report-worker")
+@click.option("--threads", default=1, show_default=True)
+def report_worker(threads):
+    for _ in range(threads - 1):
+        threading.Thread(target=report_worker_loop, daemon=True).start()
+    report_worker_loop()
+
+
+# 📊 flask --app app rebuild-rollup → recompute attendance_rollup from attendance
+@app.cli.command("rebuild-rollup")
+def rebuild_rollup():
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("LOCK TABLE attendance_rollup IN EXCLUSIVE MODE")
+        cur.execute("TRUNCATE attendance_rollup")
+        cur.execute("""
+            INSERT INTO attendance_rollup
+            (student_id, schedule_id, present, absent, last_date)
+            SELECT
+                student_id,
+                schedule_id,
+                COUNT(*) FILTER (WHERE status = 'Present'),
+                COUNT(*) FILTER (WHERE status = 'Absent'),
+                MAX(date)
+            FROM attendance
+            GROUP BY student_id, schedule_id
+        """)
+        click.echo(f"rebuilt {cur.rowcount} rollup rows")
+        conn.commit()
+        cur.close()
+
+
+# 📋 flask --app app backfill-class-summary [--from --to] → recompute
+# class_summary from attendance (all history when no range is given)
+@app.cli.command("backfill-class-summary")
+@click.option("--from", "date_from", type=click.DateTime(["%Y-%m-%d"]))
+@click.option("--to", "date_to", type=click.DateTime(["%Y-%m-%d"]))
+def backfill_class_summary(date_from, date_to):
+    date_from = date_from.date() if date_from else date.min
+    date_to = date_to.date() if date_to else date.max
+
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("LOCK TABLE class_summary IN EXCLUSIVE MODE")
+        cur.execute("""
+            DELETE FROM class_summary
+            WHERE date BETWEEN %s AND %s
+        """, (date_from, date_to))
+        cur.execute("""
+            INSERT INTO class_summary
+            (date, schedule_id, faculty_id, section_id, present, absent, marked_by)
+            SELECT
+                date,
+                schedule_id,
+                MIN(faculty_id),
+                MIN(section_id),
+                COUNT(*) FILTER (WHERE status = 'Present'),
+                COUNT(*) FILTER (WHERE status = 'Absent'),
+                mode() WITHIN GROUP (ORDER BY marked_by)
+            FROM attendance
+            WHERE date BETWEEN %s AND %s
+            GROUP BY date, schedule_id
+        """, (date_from, date_to))
+        click.echo(f"backfilled {cur.rowcount} class summaries")
+        conn.commit()
+        cur.close()
+
+
+# 🧮 flask --app app rebuild-bitmaps [--from --to] → recompute absentee
+# bitmaps from attendance
+@app.cli.command("rebuild-bitmaps")
+@click.option("--from", "date_from", type=click.DateTime(["%Y-%m-%d"]))
+@click.option("--to", "date_to", type=click.DateTime(["%Y-%m-%d"]))
+def rebuild_bitmaps(date_from, date_to):
+    date_from = date_from.date() if date_from else date.min
+    date_to = date_to.date() if date_to else date.max
+
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("LOCK TABLE attendance_bitmaps IN EXCLUSIVE MODE")
+        cur.execute("""
+            DELETE FROM attendance_bitmaps
+            WHERE date BETWEEN %(from)s AND %(to)s
+        """, {"from": date_from, "to": date_to})
+        cur.execute("""
+            WITH marks AS (
+                SELECT student_id, schedule_id, date, status
+                FROM attendance
+                WHERE date BETWEEN %(from)s AND %(to)s
+            ),
+        """ + BITMAP_CTES + """
+            SELECT COUNT(*) FROM packed
+        """, {"from": date_from, "to": date_to})
+        click.echo(f"rebuilt {cur.fetchone()[0]} bitmaps")
+        conn.commit()
+        cur.close()
+
+
+# 🗓️ flask --app app attendance-partitions [--months 6] [--detach-before DATE]
+# → create monthly attendance partitions ahead (run monthly) and detach
+# the ones that end on or before DATE, leaving them as plain tables to
+# archive or drop
+@app.cli.command("attendance-partitions")
+@click.option("--months", default=6, show_default=True, help="months ahead to create")
+@click.option("--detach-before", "detach_before", type=click.DateTime(["%Y-%m-%d"]))
+def attendance_partitions(months, detach_before):
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT ensure_attendance_partition(m::date)
+            FROM generate_series(
+                date_trunc('month', current_date),
+                date_trunc('month', current_date) + make_interval(months => %s),
+                interval '1 month'
+            ) m
+        """, (months,))
+        ready = [r[0] for r in cur.fetchall()]
+        conn.commit()
+        click.echo(f"partitions ready: {ready[0]} … {ready[-1]}")
+
+        cur.execute("SELECT COUNT(*) FROM attendance_default")
+        stray = cur.fetchone()[0]
+        if stray:
+            click.echo(f"⚠️ {stray} rows in attendance_default (dates outside every partition)")
+
+        if detach_before:
+            cur.execute("""
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'attendance'::regclass
+                  AND c.relname ~ '^attendance_[0-9]{4}_[0-9]{2}$'
+                  AND to_date(substr(c.relname, 12), 'YYYY_MM') + interval '1 month' <= %s
+                ORDER BY c.relname
+            """, (detach_before.date(),))
+            for (part,) in cur.fetchall():
+                cur.execute(f"ALTER TABLE attendance DETACH PARTITION {part}")
+                conn.commit()
+                click.echo(f"detached {part}")
+
+        cur.close()
+
+
+# 🔑 flask --app app hash-passwords → hash every plaintext (or outdated)
+# password now instead of at each faculty member's next login
+@app.cli.command("hash-passwords")
+def hash_passwords():
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT faculty_id, password FROM faculty FOR UPDATE")
+
+        updates = []
+        for faculty_id, stored in cur.fetchall():
+            if not stored.startswith("$argon2"):
+                updates.append((hash_password(stored), faculty_id))
+            elif password_hasher.check_needs_rehash(stored):
+                click.echo(f"faculty {faculty_id}: outdated hash, rehashed at next login")
+
+        cur.executemany("UPDATE faculty SET password = %s WHERE faculty_id = %s", updates)
+        conn.commit()
+        cur.close()
+        click.echo(f"hashed {len(updates)} plaintext passwords")
+
+
+# 📥 flask --app app import students|timetable FILE [--dry-run]
+@app.cli.command("import")
+@click.argument("kind", type=click.Choice(sorted(IMPORT_VALIDATORS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--dry-run", is_flag=True, help="validate and show the diff without saving")
+def import_command(kind, path, dry_run):
+    with open(path, "rb") as f:
+        try:
+            df = read_import_file(f, path)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    with db_connection() as conn:
+        try:
+            report = run_import(conn, kind, df, dry_run)
+        except ImportFileError as e:
+            raise click.ClickException(str(e))
+
+    for e in report["errors"]:
+        click.echo(f"row {e['row']}: {e['error']}")
+    if report["error_count"]:
+        raise click.ClickException(f"{report['error_count']} error(s), nothing imported")
+
+    for c in report["changes"]:
+        click.echo(f"{c['action']:<8} {c['key']}: {c['before'] or '-'} -> {c['after']}")
+
+    counts = ", ".join(f"{n} {action}" for action, n in sorted(report["counts"].items()))
+    click.echo(f"{report['rows']} rows: {counts or 'nothing to do'}; "
+               f"{report['not_in_file']} existing not in file (kept)"
+               f"{' [dry run, rolled back]' if dry_run else ''} in {report.get('seconds', 0)}s")
+
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=8000)
+
+
+
+
+
+
+
+
+
+
+
+
+
+
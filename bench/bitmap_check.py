@@ -0,0 +1,60 @@
+# 🧮 Absentee bitmap check: decode every attendance_bitmaps row with the
+# app's NumPy helpers, compare the per (student, schedule) totals with a
+# GROUP BY over attendance, and report how much smaller the bitmaps are.
+#
+#   DATABASE_URL=postgresql://... DB_SSLMODE=disable python bench/bitmap_check.py
+import os
+import sys
+import time
+
+import numpy as np
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import app as attendance_app
+
+
+def main():
+    conn = psycopg2.connect(os.environ["DATABASE_URL"], sslmode=attendance_app.DB_SSLMODE)
+    cur = conn.cursor()
+
+    started = time.perf_counter()
+    cur.execute("""
+        SELECT b.schedule_id, b.absent, r.student_ids
+        FROM attendance_bitmaps b
+        JOIN attendance_rosters r ON r.roster_key = b.roster_key
+    """)
+    students, schedules, held, absent = attendance_app.bitmap_totals(cur.fetchall())
+    bitmap_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    cur.execute("""
+        SELECT student_id, schedule_id, COUNT(*), COUNT(*) FILTER (WHERE status = 'Absent')
+        FROM attendance
+        GROUP BY student_id, schedule_id
+        ORDER BY student_id, schedule_id
+    """)
+    expected = np.array(cur.fetchall(), dtype=np.int64).reshape(-1, 4)
+    rows_ms = (time.perf_counter() - started) * 1000
+
+    cur.execute("""
+        SELECT
+            (SELECT SUM(pg_total_relation_size(relid))
+             FROM pg_partition_tree('attendance') WHERE isleaf),
+            pg_total_relation_size('attendance_bitmaps') + pg_total_relation_size('attendance_rosters')
+    """)
+    rows_bytes, bitmap_bytes = cur.fetchone()
+    conn.close()
+
+    got = np.stack([students, schedules, held, absent], axis=1)
+    mismatched = len(got) != len(expected) or not np.array_equal(got, expected)
+
+    print(f"attendance rows   {rows_bytes / 1024:>10.0f} KiB  {rows_ms:>8.1f} ms")
+    print(f"bitmaps + rosters {bitmap_bytes / 1024:>10.0f} KiB  {bitmap_ms:>8.1f} ms")
+    print(f"{len(expected)} (student, schedule) totals: {'MISMATCH' if mismatched else 'match'}")
+
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# 🔎 EXPLAIN regression check: the student / daily / faculty lookups must be
+# able to use an index on attendance (or class_summary). Sequential scans are disabled for the
+# session, so a Seq Scan in the plan means the query cannot use one at all
+# (non-sargable predicate or missing index from migrations/003). Each
+# lookup is for one date, so it must also touch at most one monthly
+# attendance partition (migrations/012).
+#
+#   DATABASE_URL=postgresql://... DB_SSLMODE=disable python bench/explain_check.py
+import json
+import os
+import re
+import sys
+from datetime import date
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import app as attendance_app
+
+
+CHECKS = [
+    ("student day", attendance_app.STUDENT_DAY_SQL, (1, date(2026, 1, 19))),
+    ("daily summary", attendance_app.DAILY_SUMMARY_SQL, (date(2026, 1, 19),)),
+    ("faculty day", """
+        SELECT s.roll_no, a.status
+        FROM attendance a
+        JOIN students s ON s.student_id = a.student_id
+        WHERE a.faculty_id = %s
+          AND a.date = %s
+        ORDER BY s.roll_no
+    """, (1, date(2026, 1, 19))),
+]
+
+
+PARTITION_RE = re.compile(r"^attendance_(\d{4}_\d{2}|default)$")
+
+
+def relations(plan):
+    found = []
+    if plan.get("Relation Name"):
+        found.append(plan)
+    for child in plan.get("Plans", []):
+        found.extend(relations(child))
+    return found
+
+
+def table_of(relation):
+    return "attendance" if PARTITION_RE.match(relation) else relation
+
+
+def seq_scans(plan, tables=("attendance", "class_summary")):
+    return [
+        node for node in relations(plan)
+        if node["Node Type"] == "Seq Scan" and table_of(node["Relation Name"]) in tables
+    ]
+
+
+def partitions(plan):
+    return {
+        node["Relation Name"] for node in relations(plan)
+        if PARTITION_RE.match(node["Relation Name"])
+    }
+
+
+def main():
+    conn = psycopg2.connect(os.environ["DATABASE_URL"], sslmode=attendance_app.DB_SSLMODE)
+    cur = conn.cursor()
+    cur.execute("SET enable_seqscan = off")
+
+    failed = 0
+    for name, query, params in CHECKS:
+        cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+        plan = cur.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        scans = seq_scans(plan[0]["Plan"])
+        touched = partitions(plan[0]["Plan"])
+        if scans:
+            failed += 1
+            print(f"FAIL  {name}: sequential scan on {scans[0]['Relation Name']}")
+        elif len(touched) > 1:
+            failed += 1
+            print(f"FAIL  {name}: not pruned, scans {', '.join(sorted(touched))}")
+        else:
+            print(f"ok    {name}")
+
+    conn.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
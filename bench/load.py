@@ -0,0 +1,320 @@
+# 🏋️ Load test: seed a scratch PostgreSQL with a synthetic semester, then
+# drive the busiest routes from concurrent virtual users and report
+# p50/p95/p99 latency, throughput and queries per request.
+#
+# Throwaway cluster in a temp dir (needs initdb/pg_ctl on PATH or PG_BIN):
+#   python bench/load.py --tempdb --concurrency 16 --duration 60
+#
+# Existing scratch database (DROPS the public schema):
+#   DATABASE_URL=postgresql://... DB_SSLMODE=disable python bench/load.py --reset
+#
+# Against a running server (gunicorn, already seeded with bench/seed.py):
+#   DATABASE_URL=postgresql://... python bench/load.py --url http://127.0.0.1:8000
+#
+# Queries per request come from the app's Server-Timing header.
+import argparse
+import http.cookiejar
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import date, timedelta
+
+import psycopg2
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+import seed as seeder
+
+# scenario -> weight
+DEFAULT_MIX = {
+    "save": 30,
+    "week-report": 30,
+    "daily-summary": 15,
+    "faculty-audit": 10,
+    "download-excel": 10,
+    "download-faculty-report": 5,
+}
+
+QUERIES_RE = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+# ---------------------------------------------------------------- database
+
+def start_tempdb():
+    pg_bin = os.environ.get("PG_BIN", "")
+    initdb = os.path.join(pg_bin, "initdb") if pg_bin else shutil.which("initdb")
+    pg_ctl = os.path.join(pg_bin, "pg_ctl") if pg_bin else shutil.which("pg_ctl")
+    if not initdb or not pg_ctl:
+        sys.exit("initdb/pg_ctl not found: put them on PATH or set PG_BIN")
+
+    datadir = tempfile.mkdtemp(prefix="attendance-bench-")
+    subprocess.run([initdb, "-D", datadir, "-U", "postgres", "-A", "trust"],
+                   check=True, stdout=subprocess.DEVNULL)
+    subprocess.run([pg_ctl, "-D", datadir, "-w", "-l", os.path.join(datadir, "log"),
+                    "-o", f"-k {datadir} -c listen_addresses='' -c max_connections=200",
+                    "start"], check=True, stdout=subprocess.DEVNULL)
+
+    def stop():
+        subprocess.run([pg_ctl, "-D", datadir, "-m", "fast", "stop"],
+                       check=False, stdout=subprocess.DEVNULL)
+        shutil.rmtree(datadir, ignore_errors=True)
+
+    return f"postgresql://postgres@/postgres?host={datadir}", stop
+
+
+def load_fixture(dsn):
+    conn = psycopg2.connect(dsn, sslmode=os.environ["DB_SSLMODE"])
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT schedule_id, faculty_id, section_id, day_of_week
+        FROM class_schedule
+    """)
+    schedules = cur.fetchall()
+    cur.execute("SELECT faculty_id FROM faculty WHERE role = 'hod' LIMIT 1")
+    hod = cur.fetchone()[0]
+    conn.close()
+
+    by_faculty = defaultdict(list)
+    for s in schedules:
+        by_faculty[s[1]].append(s)
+    return by_faculty, hod
+
+
+def class_date(day_of_week, weeks):
+    start = date.fromisoformat(seeder.SEMESTER_START)
+    offset = seeder.DAYS.index(day_of_week)
+    return start + timedelta(weeks=random.randrange(weeks), days=offset)
+
+
+# ---------------------------------------------------------------- clients
+
+class InProcessClient:
+
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def request(self, method, path, data=None):
+        if method == "POST":
+            r = self.client.post(path, data=data)
+        else:
+            r = self.client.get(path)
+        r.get_data()
+        return r.status_code, r.headers.get("Server-Timing", "")
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HTTPClient:
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect
+        )
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req, timeout=120) as r:
+                r.read()
+                return r.status, r.headers.get("Server-Timing", "")
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, e.headers.get("Server-Timing", "")
+
+
+# ---------------------------------------------------------------- users
+
+class VirtualUser:
+
+    def __init__(self, make_client, faculty_id, schedules, hod_id, weeks):
+        self.make_client = make_client
+        self.faculty_id = faculty_id
+        self.schedules = schedules
+        self.weeks = weeks
+
+        self.faculty = make_client()
+        self.login(self.faculty)
+
+        self.admin = make_client()
+        self.admin.request("POST", "/faculty-login", {
+            "login_type": "admin",
+            "faculty_id": hod_id,
+            "password": seeder.PASSWORD,
+            "section_id": schedules[0][2],
+        })
+
+    def login(self, client):
+        return client.request("POST", "/faculty-login", {
+            "login_type": "faculty",
+            "faculty_id": self.faculty_id,
+            "password": seeder.PASSWORD,
+            "section_id": self.schedules[0][2],
+        })
+
+    def run(self, scenario):
+        schedule_id, _, _, day = random.choice(self.schedules)
+        d = class_date(day, self.weeks).isoformat()
+
+        if scenario == "save":
+            form = {"schedule_id": schedule_id, "attendance_date": d}
+            for i in range(random.randint(0, 8)):
+                form[f"att_{random.randint(1, 5000)}"] = "Absent"
+            return self.faculty.request("POST", "/save", form)
+        if scenario == "week-report":
+            return self.faculty.request("GET", f"/week-report?date={d}&schedule_id={schedule_id}&filter=All")
+        if scenario == "daily-summary":
+            return self.faculty.request("GET", f"/daily-summary?date={d}")
+        if scenario == "faculty-audit":
+            return self.admin.request("GET", f"/faculty-audit?date={d}")
+        if scenario == "download-excel":
+            return self.admin.request("GET", f"/download-excel?date={d}")
+        if scenario == "login":
+            # Fresh session each time: the morning burst, password check included
+            return self.login(self.make_client())
+        if scenario == "download-faculty-report":
+            return self.admin.request("GET", f"/download-faculty-report?from={d}&to={d}")
+        raise ValueError(scenario)
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(p / 100.0 * len(values) + 0.5)) - 1))
+    return values[k]
+
+
+def drive(users, mix, duration):
+    scenarios = list(mix)
+    weights = [mix[s] for s in scenarios]
+    results = defaultdict(list)        # scenario -> [(seconds, status, queries)]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(user):
+        local = defaultdict(list)
+        while time.monotonic() < deadline:
+            scenario = random.choices(scenarios, weights)[0]
+            started = time.perf_counter()
+            status, timing = user.run(scenario)
+            elapsed = time.perf_counter() - started
+            m = QUERIES_RE.search(timing)
+            local[scenario].append((elapsed, status, int(m.group(1)) if m else None))
+        with lock:
+            for k, v in local.items():
+                results[k].extend(v)
+
+    threads = [threading.Thread(target=worker, args=(u,)) for u in users]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, time.monotonic() - started
+
+
+def report(results, wall):
+    header = f"{'scenario':<26}{'reqs':>7}{'err':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>8}{'q/req':>7}"
+    print(header)
+    print("-" * len(header))
+
+    total = errors = 0
+    for scenario in sorted(results):
+        rows = results[scenario]
+        latencies = [r[0] * 1000 for r in rows]
+        errs = sum(1 for r in rows if r[1] >= 400)
+        queries = [r[2] for r in rows if r[2] is not None]
+        total += len(rows)
+        errors += errs
+        print(f"{scenario:<26}{len(rows):>7}{errs:>6}"
+              f"{percentile(latencies, 50):>9.1f}{percentile(latencies, 95):>9.1f}"
+              f"{percentile(latencies, 99):>9.1f}{len(rows) / wall:>8.1f}"
+              f"{(sum(queries) / len(queries)) if queries else float('nan'):>7.1f}")
+
+    all_latencies = [r[0] * 1000 for rows in results.values() for r in rows]
+    print("-" * len(header))
+    print(f"{'all':<26}{total:>7}{errors:>6}"
+          f"{percentile(all_latencies, 50):>9.1f}{percentile(all_latencies, 95):>9.1f}"
+          f"{percentile(all_latencies, 99):>9.1f}{total / wall:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="attendance load test")
+    seeder.add_arguments(parser)
+    parser.add_argument("--tempdb", action="store_true", help="start a throwaway PostgreSQL in a temp dir")
+    parser.add_argument("--reset", action="store_true", help="drop, re-seed and migrate DATABASE_URL")
+    parser.add_argument("--url", help="drive a running server over HTTP instead of in-process")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--mix", help="e.g. save=50,week-report=50 or login=100 (default: roll-call mix)")
+    args = parser.parse_args()
+
+    mix = DEFAULT_MIX
+    if args.mix:
+        mix = {k: float(v) for k, v in (item.split("=") for item in args.mix.split(","))}
+
+    stop = None
+    if args.tempdb:
+        os.environ["DATABASE_URL"], stop = start_tempdb()
+        os.environ["DB_SSLMODE"] = "disable"
+        args.reset = True
+    os.environ.setdefault("DB_SSLMODE", "require")
+    os.environ.setdefault("DB_POOL_MAX", str(args.concurrency))
+
+    try:
+        dsn = os.environ["DATABASE_URL"]
+
+        if args.reset:
+            conn = psycopg2.connect(dsn, sslmode=os.environ["DB_SSLMODE"])
+            seeder.reset(conn)
+            started = time.perf_counter()
+            marks = seeder.seed(conn, args.sections, args.faculty, args.students, args.periods, args.weeks)
+            conn.close()
+            print(f"seeded {marks} attendance rows in {time.perf_counter() - started:.1f}s")
+
+        if args.url:
+            make_client = lambda: HTTPClient(args.url)
+        else:
+            sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+            import app as attendance_app
+            if args.reset:
+                result = attendance_app.app.test_cli_runner().invoke(args=["migrate"])
+                if result.exit_code != 0:
+                    raise SystemExit(result.output or result.exception)
+            make_client = lambda: InProcessClient(attendance_app.app)
+
+        by_faculty, hod = load_fixture(dsn)
+        faculty_ids = sorted(by_faculty)
+        users = [
+            VirtualUser(make_client, f, by_faculty[f], hod, args.weeks)
+            for f in (faculty_ids[i % len(faculty_ids)] for i in range(args.concurrency))
+        ]
+
+        print(f"{args.concurrency} users for {args.duration:.0f}s "
+              f"({'HTTP ' + args.url if args.url else 'in-process'})")
+        results, wall = drive(users, mix, args.duration)
+        report(results, wall)
+    finally:
+        if stop:
+            stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# 🔑 Pick the argon2 cost for login: for each (time cost, memory) pair,
+# time password verification during a morning burst (--threads verifies
+# at once, like one gunicorn worker's threads all logging people in) and
+# compare the p95 with the login budget. The strongest setting within
+# budget is printed as PASSWORD_* environment variables for app.py.
+#
+#   python bench/password_cost.py --budget-ms 250 --threads 8
+#   python bench/password_cost.py --time-costs 1,2,3 --memory-kib 19456,47104
+#
+# The budget is for the whole login request; --overhead-ms is what the
+# rest of it (query, session, redirect) costs and is subtracted first.
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from argon2 import PasswordHasher
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+from load import percentile
+
+
+def measure(time_cost, memory_kib, parallelism, threads, rounds):
+    hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_kib, parallelism=parallelism)
+    stored = hasher.hash("correct horse battery staple")
+
+    def verify(_):
+        started = time.perf_counter()
+        hasher.verify(stored, "correct horse battery staple")
+        return (time.perf_counter() - started) * 1000
+
+    single = [verify(None) for _ in range(rounds)]
+    with ThreadPoolExecutor(threads) as pool:
+        burst = list(pool.map(verify, range(threads * rounds)))
+    return percentile(single, 50), percentile(burst, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="argon2 cost vs login p95 budget")
+    parser.add_argument("--budget-ms", type=float, default=250, help="login p95 budget")
+    parser.add_argument("--overhead-ms", type=float, default=20, help="rest of the login request")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("GUNICORN_THREADS", "8")))
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--time-costs", default="1,2,3,4")
+    parser.add_argument("--memory-kib", default="19456,47104,65536")
+    parser.add_argument("--parallelism", type=int, default=1)
+    args = parser.parse_args()
+
+    allowed = args.budget_ms - args.overhead_ms
+    header = f"{'time':>5}{'memory KiB':>12}{'p50 ms':>9}{'burst p95':>11}  within {allowed:.0f} ms"
+    print(header)
+    print("-" * len(header))
+
+    best = None
+    for memory_kib in (int(m) for m in args.memory_kib.split(",")):
+        for time_cost in (int(t) for t in args.time_costs.split(",")):
+            p50, p95 = measure(time_cost, memory_kib, args.parallelism, args.threads, args.rounds)
+            ok = p95 <= allowed
+            print(f"{time_cost:>5}{memory_kib:>12}{p50:>9.1f}{p95:>11.1f}  {'yes' if ok else 'no'}")
+            # Strongest = most work per guess
+            if ok and (best is None or time_cost * memory_kib > best[0] * best[1]):
+                best = (time_cost, memory_kib)
+
+    print()
+    if best:
+        print(f"PASSWORD_TIME_COST={best[0]} PASSWORD_MEMORY_KIB={best[1]} "
+              f"PASSWORD_PARALLELISM={args.parallelism}")
+    else:
+        print("no setting fits the budget: raise it, or lower --threads / the cost range")
+
+
+if __name__ == "__main__":
+    main()
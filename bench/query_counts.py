@@ -0,0 +1,82 @@
+# 🔢 Query-count regression check: each page below must stay within its
+# budget of SQL statements per request (counted by the app's
+# instrumentation and read back from the Server-Timing header). Every
+# request is made twice and the second, warm-cache one is measured, so
+# the reference-data load does not count. The response cache is switched
+# off so the budgets measure the queries that actually build each page.
+#
+# Needs a database seeded by bench/seed.py (or bench/load.py --reset):
+#   DATABASE_URL=postgresql://... DB_SSLMODE=disable python bench/query_counts.py
+import os
+import sys
+import urllib.parse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+
+os.environ["RESPONSE_CACHE"] = "0"
+
+import app as attendance_app
+import seed as seeder
+from load import QUERIES_RE, InProcessClient, class_date, load_fixture
+
+
+def budgets(schedule, hod):
+    schedule_id, faculty_id, section_id, day = schedule
+    d = class_date(day, 1).isoformat()
+    subject = urllib.parse.quote(attendance_app.ref_data().schedule(schedule_id).subject)
+
+    # (who, method, path, form, max queries)
+    return [
+        ("faculty", "POST", "/save", {"schedule_id": schedule_id, "attendance_date": d}, 1),
+        ("faculty", "GET", f"/week-report?date={d}&schedule_id={schedule_id}&filter=All", None, 1),
+        ("faculty", "GET", f"/week-report?date={d}&schedule_id={schedule_id}&filter=Absent", None, 1),
+        ("faculty", "GET", f"/daily-summary?date={d}", None, 1),
+        ("admin", "GET", f"/faculty-audit?date={d}", None, 1),
+        ("admin", "GET", f"/admin-attendance?faculty_id={faculty_id}&subject={subject}&date={d}", None, 1),
+        ("admin", "GET", "/admin-attendance", None, 0),
+    ]
+
+
+def login(login_type, faculty_id, section_id):
+    client = InProcessClient(attendance_app.app)
+    client.request("POST", "/faculty-login", {
+        "login_type": login_type,
+        "faculty_id": faculty_id,
+        "password": seeder.PASSWORD,
+        "section_id": section_id,
+    })
+    return client
+
+
+def main():
+    by_faculty, hod = load_fixture(os.environ["DATABASE_URL"])
+    faculty_id = min(by_faculty)
+    schedule = by_faculty[faculty_id][0]
+
+    clients = {
+        "faculty": login("faculty", faculty_id, schedule[2]),
+        "admin": login("admin", hod, schedule[2]),
+    }
+
+    failed = 0
+    for who, method, path, form, limit in budgets(schedule, hod):
+        client = clients[who]
+        client.request(method, path, form)
+        status, timing = client.request(method, path, form)
+
+        m = QUERIES_RE.search(timing)
+        queries = int(m.group(1)) if m else 0
+
+        if status >= 400 or queries > limit:
+            failed += 1
+            print(f"FAIL  {method} {path}: {status}, {queries} queries (budget {limit})")
+        else:
+            print(f"ok    {method} {path}: {queries} queries")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
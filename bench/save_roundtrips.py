@@ -0,0 +1,118 @@
+# 📏 Round trips per /save submission (new single-statement path vs the old per-student loop)
+#
+#   DATABASE_URL=postgresql://... DB_SSLMODE=disable python bench/save_roundtrips.py <schedule_id> <faculty_id> [repeat] [YYYY-MM-DD]
+#
+# Runs against a real database and rolls nothing back, so point it at a scratch copy.
+import functools
+import os
+import sys
+import time
+from datetime import date, datetime
+
+import psycopg2
+import psycopg2.extensions
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import app as attendance_app
+
+
+class CountingCursor(psycopg2.extensions.cursor):
+
+    def execute(self, query, vars=None):
+        self.connection.round_trips += 1
+        return super().execute(query, vars)
+
+
+class CountingConnection(psycopg2.extensions.connection):
+
+    round_trips = 0
+
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault("cursor_factory", CountingCursor)
+        return super().cursor(*args, **kwargs)
+
+    def commit(self):
+        self.round_trips += 1
+        return super().commit()
+
+    def rollback(self):
+        self.round_trips += 1
+        return super().rollback()
+
+
+def legacy_save(conn, schedule_id, class_date, absent_ids, marked_by):
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT faculty_id, section_id, group_id
+        FROM class_schedule
+        WHERE schedule_id = %s
+    """, (schedule_id,))
+    faculty_id, section_id, group_id = cur.fetchone()
+
+    if group_id:
+        cur.execute("SELECT student_id FROM students WHERE section_id=%s AND group_id=%s",
+                    (section_id, group_id))
+    else:
+        cur.execute("SELECT student_id FROM students WHERE section_id=%s", (section_id,))
+
+    for (student_id,) in cur.fetchall():
+        status = "Absent" if student_id in absent_ids else "Present"
+        cur.execute("""
+            INSERT INTO attendance
+            (student_id, faculty_id, section_id, schedule_id,
+             week_id, date, status, marked_by)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+            ON CONFLICT (student_id, schedule_id, date)
+            DO UPDATE SET
+                status = EXCLUDED.status,
+                marked_by = EXCLUDED.marked_by
+        """, (student_id, faculty_id, section_id, schedule_id, 1, class_date, status, marked_by))
+
+    conn.commit()
+    cur.close()
+
+
+def main():
+    schedule_id = int(sys.argv[1])
+    faculty_id = int(sys.argv[2])
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    class_date = datetime.strptime(sys.argv[4], "%Y-%m-%d").date() if len(sys.argv) > 4 else date.today()
+
+    connect = functools.partial(psycopg2.connect, connection_factory=CountingConnection)
+
+    # ⏱️ Old loop on a dedicated connection
+    conn = connect(os.environ["DATABASE_URL"], sslmode=attendance_app.DB_SSLMODE)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        legacy_save(conn, schedule_id, class_date, set(), faculty_id)
+    legacy_ms = (time.perf_counter() - started) * 1000 / repeat
+    legacy_trips = conn.round_trips / repeat
+    conn.close()
+
+    # ⏱️ New path through the Flask route and the pool
+    attendance_app.psycopg2.connect = connect
+    client = attendance_app.app.test_client()
+    with client.session_transaction() as s:
+        s["faculty_id"] = faculty_id
+        s["role"] = "faculty"
+
+    form = {"schedule_id": str(schedule_id), "attendance_date": class_date.isoformat()}
+    response = client.post("/save", data=form)      # warm the pool
+    if response.status_code != 302:
+        sys.exit(f"/save rejected the submission: {response.status_code} {response.get_data(as_text=True)}")
+    pool = attendance_app.get_pool()
+    before = sum(c.round_trips for c, _ in pool._idle)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        client.post("/save", data=form)
+    route_ms = (time.perf_counter() - started) * 1000 / repeat
+    route_trips = (sum(c.round_trips for c, _ in pool._idle) - before) / repeat
+
+    print(f"{'path':<14}{'round trips':>12}{'ms / save':>12}")
+    print(f"{'legacy loop':<14}{legacy_trips:>12.1f}{legacy_ms:>12.2f}")
+    print(f"{'/save':<14}{route_trips:>12.1f}{route_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
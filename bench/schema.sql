@@ -0,0 +1,44 @@
+-- 🧱 Core tables the app expects (the production database predates
+-- migrations/). Used by the benchmark harness to build a scratch database.
+CREATE TABLE IF NOT EXISTS faculty (
+    faculty_id SERIAL PRIMARY KEY,
+    name       TEXT NOT NULL,
+    role       TEXT NOT NULL DEFAULT 'faculty',
+    password   TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sections (
+    section_id   SERIAL PRIMARY KEY,
+    section_name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS students (
+    student_id SERIAL PRIMARY KEY,
+    roll_no    TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    section_id INT  NOT NULL REFERENCES sections(section_id),
+    group_id   INT
+);
+
+CREATE TABLE IF NOT EXISTS class_schedule (
+    schedule_id SERIAL PRIMARY KEY,
+    faculty_id  INT  NOT NULL REFERENCES faculty(faculty_id),
+    section_id  INT  NOT NULL REFERENCES sections(section_id),
+    subject     TEXT NOT NULL,
+    group_id    INT,
+    day_of_week TEXT NOT NULL,
+    period_no   INT  NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS attendance (
+    attendance_id BIGSERIAL PRIMARY KEY,
+    student_id    INT  NOT NULL REFERENCES students(student_id),
+    faculty_id    INT  NOT NULL REFERENCES faculty(faculty_id),
+    section_id    INT  NOT NULL REFERENCES sections(section_id),
+    schedule_id   INT  NOT NULL REFERENCES class_schedule(schedule_id),
+    week_id       INT,
+    date          DATE NOT NULL,
+    status        TEXT NOT NULL,
+    marked_by     INT  REFERENCES faculty(faculty_id),
+    UNIQUE (student_id, schedule_id, date)
+);
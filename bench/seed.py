@@ -0,0 +1,137 @@
+# 🌱 Synthetic institution for benchmarks: sections, faculty, a weekly
+# timetable and a full semester of attendance, generated set-based in SQL.
+#
+#   DATABASE_URL=postgresql://... python bench/seed.py --reset --sections 12 --faculty 40
+#   DATABASE_URL=postgresql://... flask --app app migrate
+import argparse
+import os
+
+import psycopg2
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SEMESTER_START = "2026-01-19"        # matches the semester seeded by migrations/004
+PASSWORD = "bench"
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+def seed(conn, sections=12, faculty=40, students=60, periods=6, weeks=20, absent_rate=0.15):
+    cur = conn.cursor()
+
+    with open(os.path.join(BENCH_DIR, "schema.sql")) as f:
+        cur.execute(f.read())
+
+    cur.execute("""
+        INSERT INTO faculty (name, role, password)
+        SELECT 'Faculty ' || g, 'faculty', %s FROM generate_series(1, %s) g
+    """, (PASSWORD, faculty))
+    cur.execute("""
+        INSERT INTO faculty (name, role, password)
+        VALUES ('Bench HOD', 'hod', %s), ('Bench AHOD', 'ahod', %s)
+    """, (PASSWORD, PASSWORD))
+
+    cur.execute("""
+        INSERT INTO sections (section_name)
+        SELECT 'SEC-' || lpad(g::text, 2, '0') FROM generate_series(1, %s) g
+    """, (sections,))
+
+    # Two lab groups per section
+    cur.execute("""
+        INSERT INTO students (roll_no, name, section_id, group_id)
+        SELECT
+            'R' || lpad(s.section_id::text, 2, '0') || lpad(g::text, 3, '0'),
+            'Student ' || s.section_id || '-' || g,
+            s.section_id,
+            1 + g %% 2
+        FROM sections s
+        CROSS JOIN generate_series(1, %s) g
+    """, (students,))
+
+    # Whole-section theory periods, plus the last period on Tue/Thu split
+    # into two lab groups with different faculty.
+    cur.execute("""
+        INSERT INTO class_schedule
+        (faculty_id, section_id, subject, group_id, day_of_week, period_no)
+        SELECT
+            1 + (s.section_id * 7 + d.n * %(periods)s + p) %% %(faculty)s,
+            s.section_id,
+            'Subject ' || (1 + (p + d.n) %% 8),
+            NULL,
+            d.day,
+            p
+        FROM sections s
+        CROSS JOIN unnest(%(days)s::text[]) WITH ORDINALITY AS d(day, n)
+        CROSS JOIN generate_series(1, %(periods)s) p
+        WHERE NOT (d.day IN ('Tuesday', 'Thursday') AND p = %(periods)s)
+        UNION ALL
+        SELECT
+            1 + (s.section_id * 11 + grp * 3) %% %(faculty)s,
+            s.section_id,
+            'Lab ' || (1 + s.section_id %% 4),
+            grp,
+            d.day,
+            %(periods)s
+        FROM sections s
+        CROSS JOIN unnest(ARRAY['Tuesday', 'Thursday']) AS d(day)
+        CROSS JOIN generate_series(1, 2) grp
+    """, {"periods": periods, "faculty": faculty, "days": DAYS})
+
+    cur.execute("""
+        INSERT INTO attendance
+        (student_id, faculty_id, section_id, schedule_id,
+         week_id, date, status, marked_by)
+        SELECT
+            st.student_id,
+            cs.faculty_id,
+            cs.section_id,
+            cs.schedule_id,
+            (d::date - %(start)s::date) / 7 + 1,
+            d::date,
+            CASE WHEN random() < %(absent)s THEN 'Absent' ELSE 'Present' END,
+            cs.faculty_id
+        FROM generate_series(%(start)s::date, %(start)s::date + %(days)s - 1, '1 day') d
+        JOIN class_schedule cs ON cs.day_of_week = TO_CHAR(d, 'FMDay')
+        JOIN students st
+          ON st.section_id = cs.section_id
+         AND (cs.group_id IS NULL OR st.group_id = cs.group_id)
+    """, {"start": SEMESTER_START, "days": weeks * 7, "absent": absent_rate})
+    marks = cur.rowcount
+
+    conn.commit()
+    cur.execute("ANALYZE")
+    cur.close()
+    return marks
+
+
+def reset(conn):
+    cur = conn.cursor()
+    cur.execute("DROP SCHEMA public CASCADE")
+    cur.execute("CREATE SCHEMA public")
+    conn.commit()
+    cur.close()
+
+
+def add_arguments(parser):
+    parser.add_argument("--sections", type=int, default=12)
+    parser.add_argument("--faculty", type=int, default=40)
+    parser.add_argument("--students", type=int, default=60, help="students per section")
+    parser.add_argument("--periods", type=int, default=6, help="periods per day")
+    parser.add_argument("--weeks", type=int, default=20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_arguments(parser)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate the public schema first")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(os.environ["DATABASE_URL"], sslmode=os.environ.get("DB_SSLMODE", "require"))
+    if args.reset:
+        reset(conn)
+
+    marks = seed(conn, args.sections, args.faculty, args.students, args.periods, args.weeks)
+    print(f"seeded {marks} attendance rows")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
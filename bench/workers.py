@@ -0,0 +1,88 @@
+# ⚖️ Sync vs threaded gunicorn under the same load. Starts gunicorn once
+# per worker mode on a local port, drives it with bench/load.py's virtual
+# users over HTTP, and prints both reports. Seed the database first
+# (bench/seed.py or bench/load.py --reset).
+#
+#   DATABASE_URL=postgresql://... DB_SSLMODE=disable python bench/workers.py --workers 2 --concurrency 24
+#   ... --modes sync,gthread,gevent --mix save=40,download-excel=30,week-report=30
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, BENCH_DIR)
+import load
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not start on port {port}")
+
+
+def run_mode(mode, args, mix, by_faculty, hod):
+    env = dict(os.environ)
+    env.update({
+        "GUNICORN_WORKER_CLASS": mode,
+        "WEB_CONCURRENCY": str(args.workers),
+        "GUNICORN_THREADS": str(args.threads),
+        "PORT": str(args.port),
+    })
+
+    server = subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(args.port)
+        url = f"http://127.0.0.1:{args.port}"
+        faculty_ids = sorted(by_faculty)
+        users = [
+            load.VirtualUser(lambda: load.HTTPClient(url), f, by_faculty[f], hod, args.weeks)
+            for f in (faculty_ids[i % len(faculty_ids)] for i in range(args.concurrency))
+        ]
+
+        print(f"\n== {mode}: {args.workers} workers"
+              f"{f' x {args.threads} threads' if mode == 'gthread' else ''}, "
+              f"{args.concurrency} users, {args.duration:.0f}s")
+        results, wall = load.drive(users, mix, args.duration)
+        load.report(results, wall)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gunicorn worker-mode comparison")
+    parser.add_argument("--modes", default="sync,gthread")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--weeks", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mix", help="as in bench/load.py")
+    args = parser.parse_args()
+
+    mix = load.DEFAULT_MIX
+    if args.mix:
+        mix = {k: float(v) for k, v in (item.split("=") for item in args.mix.split(","))}
+
+    os.environ.setdefault("DB_SSLMODE", "require")
+    by_faculty, hod = load.load_fixture(os.environ["DATABASE_URL"])
+
+    for mode in args.modes.split(","):
+        run_mode(mode, args, mix, by_faculty, hod)
+
+
+if __name__ == "__main__":
+    main()
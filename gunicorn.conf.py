@@ -0,0 +1,32 @@
+# 🦄 gunicorn settings (picked up automatically from the working directory)
+#
+# Default: gthread workers. Requests spend most of their time waiting on
+# PostgreSQL, so each worker runs GUNICORN_THREADS requests at once on a
+# DB_POOL_MAX-connection pool; app.py's concurrency gates keep exports
+# from taking every connection.
+#
+# GUNICORN_WORKER_CLASS=gevent switches to greenlets (needs gevent and
+# psycogreen installed); GUNICORN_WORKER_CLASS=sync restores the old
+# one-request-per-worker behaviour.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "100"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+keepalive = 5
+
+# Pool size follows concurrency unless set explicitly
+if worker_class == "gthread":
+    os.environ.setdefault("DB_POOL_MAX", str(max(2, threads // 2 + 1)))
+elif worker_class == "gevent":
+    os.environ.setdefault("DB_POOL_MAX", "10")
+
+
+def post_fork(server, worker):
+    # psycopg2 blocks the whole hub unless it yields to gevent
+    if worker_class == "gevent":
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
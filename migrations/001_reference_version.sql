@@ -0,0 +1,31 @@
+-- 🔢 Version counter for the reference tables cached by each worker
+CREATE TABLE IF NOT EXISTS reference_version (
+    id      INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 1
+);
+
+INSERT INTO reference_version (id, version)
+VALUES (1, 1)
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_reference_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS faculty_reference_version ON faculty;
+CREATE TRIGGER faculty_reference_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON faculty
+FOR EACH STATEMENT EXECUTE FUNCTION bump_reference_version();
+
+DROP TRIGGER IF EXISTS sections_reference_version ON sections;
+CREATE TRIGGER sections_reference_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON sections
+FOR EACH STATEMENT EXECUTE FUNCTION bump_reference_version();
+
+DROP TRIGGER IF EXISTS class_schedule_reference_version ON class_schedule;
+CREATE TRIGGER class_schedule_reference_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON class_schedule
+FOR EACH STATEMENT EXECUTE FUNCTION bump_reference_version();
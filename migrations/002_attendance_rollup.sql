@@ -0,0 +1,20 @@
+-- 📊 Running present/absent totals per student per class, kept by /save
+CREATE TABLE IF NOT EXISTS attendance_rollup (
+    student_id  INT  NOT NULL,
+    schedule_id INT  NOT NULL,
+    present     INT  NOT NULL DEFAULT 0,
+    absent      INT  NOT NULL DEFAULT 0,
+    last_date   DATE,
+    PRIMARY KEY (student_id, schedule_id)
+);
+
+INSERT INTO attendance_rollup (student_id, schedule_id, present, absent, last_date)
+SELECT
+    student_id,
+    schedule_id,
+    COUNT(*) FILTER (WHERE status = 'Present'),
+    COUNT(*) FILTER (WHERE status = 'Absent'),
+    MAX(date)
+FROM attendance
+GROUP BY student_id, schedule_id
+ON CONFLICT (student_id, schedule_id) DO NOTHING;
@@ -0,0 +1,11 @@
+-- no-transaction
+-- 🔎 Indexes behind the student, daily and faculty lookups.
+-- Built CONCURRENTLY so marking can continue while they build.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS attendance_student_date_idx
+    ON attendance (student_id, date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS attendance_date_schedule_idx
+    ON attendance (date, schedule_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS attendance_faculty_date_idx
+    ON attendance (faculty_id, date);
@@ -0,0 +1,29 @@
+-- 📅 Semester calendar (was hard-coded as 19 Jan 2026, 20 weeks)
+CREATE TABLE IF NOT EXISTS semesters (
+    semester_id SERIAL PRIMARY KEY,
+    name        TEXT NOT NULL,
+    start_date  DATE NOT NULL,
+    total_weeks INT  NOT NULL DEFAULT 20
+);
+
+CREATE TABLE IF NOT EXISTS holidays (
+    holiday_date DATE NOT NULL,
+    semester_id  INT  NOT NULL REFERENCES semesters(semester_id) ON DELETE CASCADE,
+    reason       TEXT NOT NULL DEFAULT 'Holiday',
+    PRIMARY KEY (semester_id, holiday_date)
+);
+
+INSERT INTO semesters (name, start_date, total_weeks)
+SELECT 'Jan 2026', DATE '2026-01-19', 20
+WHERE NOT EXISTS (SELECT 1 FROM semesters);
+
+-- Worker caches reload when these change (see 001_reference_version.sql)
+DROP TRIGGER IF EXISTS semesters_reference_version ON semesters;
+CREATE TRIGGER semesters_reference_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON semesters
+FOR EACH STATEMENT EXECUTE FUNCTION bump_reference_version();
+
+DROP TRIGGER IF EXISTS holidays_reference_version ON holidays;
+CREATE TRIGGER holidays_reference_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON holidays
+FOR EACH STATEMENT EXECUTE FUNCTION bump_reference_version();
@@ -0,0 +1,18 @@
+-- 📦 Queue for reports built in the background (see REPORT JOBS in app.py)
+CREATE TABLE IF NOT EXISTS report_jobs (
+    job_id       BIGSERIAL PRIMARY KEY,
+    job_key      TEXT NOT NULL UNIQUE,          -- sha1 of kind + parameters
+    kind         TEXT NOT NULL,
+    params       JSONB NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'queued', -- queued | running | done | failed
+    error        TEXT,
+    attempts     INT NOT NULL DEFAULT 0,
+    requested_by INT,
+    requested_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    started_at   TIMESTAMPTZ,
+    finished_at  TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS report_jobs_pending_idx
+    ON report_jobs (requested_at)
+    WHERE status IN ('queued', 'running');
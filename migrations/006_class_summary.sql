@@ -0,0 +1,30 @@
+-- 📋 One row per class held: present / absent counts and who marked it.
+-- Kept by /save; `flask --app app backfill-class-summary` recomputes it.
+CREATE TABLE IF NOT EXISTS class_summary (
+    date         DATE NOT NULL,
+    schedule_id  INT  NOT NULL,
+    faculty_id   INT  NOT NULL,
+    section_id   INT  NOT NULL,
+    present      INT  NOT NULL DEFAULT 0,
+    absent       INT  NOT NULL DEFAULT 0,
+    marked_by    INT,
+    last_updated TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (date, schedule_id)
+);
+
+CREATE INDEX IF NOT EXISTS class_summary_faculty_date_idx
+    ON class_summary (faculty_id, date);
+
+INSERT INTO class_summary
+(date, schedule_id, faculty_id, section_id, present, absent, marked_by)
+SELECT
+    date,
+    schedule_id,
+    MIN(faculty_id),
+    MIN(section_id),
+    COUNT(*) FILTER (WHERE status = 'Present'),
+    COUNT(*) FILTER (WHERE status = 'Absent'),
+    mode() WITHIN GROUP (ORDER BY marked_by)
+FROM attendance
+GROUP BY date, schedule_id
+ON CONFLICT (date, schedule_id) DO NOTHING;
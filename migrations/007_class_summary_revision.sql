@@ -0,0 +1,9 @@
+-- 🏷️ Every write to a class_summary row draws a fresh revision; the
+-- (count, sum of revisions) for a date is the change marker behind the
+-- report ETags, and unlike a timestamp it moves even when transactions
+-- commit out of order.
+CREATE SEQUENCE IF NOT EXISTS class_summary_revision_seq;
+
+ALTER TABLE class_summary
+    ADD COLUMN IF NOT EXISTS revision BIGINT NOT NULL
+    DEFAULT nextval('class_summary_revision_seq');
@@ -0,0 +1,10 @@
+-- 📶 Idempotency keys of offline submissions posted to /sync-attendance
+CREATE TABLE IF NOT EXISTS attendance_sync (
+    idempotency_key TEXT PRIMARY KEY,
+    faculty_id      INT  NOT NULL,
+    schedule_id     INT  NOT NULL,
+    date            DATE NOT NULL,
+    client_ts       TIMESTAMPTZ,
+    status          TEXT NOT NULL,      -- applied | stale
+    received_at     TIMESTAMPTZ NOT NULL DEFAULT now()
+);
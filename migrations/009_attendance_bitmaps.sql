@@ -0,0 +1,74 @@
+-- 🧮 Absentee bitmaps: one row per class held, one bit per roster student
+-- (roll-number order, MSB first, 1 = absent). Rosters are stored once per
+-- distinct student list, keyed by md5 of the array. Kept by /save;
+-- `flask --app app rebuild-bitmaps` recomputes them.
+CREATE TABLE IF NOT EXISTS attendance_rosters (
+    roster_key  UUID  PRIMARY KEY,
+    student_ids INT[] NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS attendance_bitmaps (
+    schedule_id INT   NOT NULL,
+    date        DATE  NOT NULL,
+    roster_key  UUID  NOT NULL,
+    absent      BYTEA NOT NULL,
+    PRIMARY KEY (schedule_id, date)
+);
+
+CREATE INDEX IF NOT EXISTS attendance_bitmaps_date_idx
+    ON attendance_bitmaps (date);
+
+WITH marks AS (
+    SELECT student_id, schedule_id, date, status
+    FROM attendance
+),
+bits AS (
+    SELECT
+        m.schedule_id,
+        m.date,
+        m.student_id,
+        (m.status = 'Absent')::int AS absent,
+        row_number() OVER (
+            PARTITION BY m.schedule_id, m.date
+            ORDER BY st.roll_no, m.student_id
+        ) - 1 AS pos
+    FROM marks m
+    JOIN students st ON st.student_id = m.student_id
+),
+bytes AS (
+    SELECT schedule_id, date, pos / 8 AS byte_no,
+           SUM(absent << (7 - pos % 8)::int) AS val
+    FROM bits
+    GROUP BY schedule_id, date, pos / 8
+),
+packed AS (
+    SELECT
+        b.schedule_id,
+        b.date,
+        r.student_ids,
+        md5(r.student_ids::text)::uuid AS roster_key,
+        decode(string_agg(lpad(to_hex(b.val), 2, '0'), '' ORDER BY b.byte_no), 'hex') AS absent
+    FROM bytes b
+    JOIN (
+        SELECT schedule_id, date, array_agg(student_id ORDER BY pos) AS student_ids
+        FROM bits
+        GROUP BY schedule_id, date
+    ) r ON r.schedule_id = b.schedule_id AND r.date = b.date
+    GROUP BY b.schedule_id, b.date, r.student_ids
+),
+rosters AS (
+    INSERT INTO attendance_rosters (roster_key, student_ids)
+    SELECT DISTINCT roster_key, student_ids
+    FROM packed
+    ON CONFLICT (roster_key) DO NOTHING
+),
+bitmaps AS (
+    INSERT INTO attendance_bitmaps (schedule_id, date, roster_key, absent)
+    SELECT schedule_id, date, roster_key, absent
+    FROM packed
+    ON CONFLICT (schedule_id, date)
+    DO UPDATE SET
+        roster_key = EXCLUDED.roster_key,
+        absent = EXCLUDED.absent
+)
+SELECT COUNT(*) FROM packed;
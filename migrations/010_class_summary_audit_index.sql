@@ -0,0 +1,6 @@
+-- no-transaction
+-- 🔎 Covering index for the paginated faculty audit log: keyset order
+-- (date, section, class faculty, marker) and every filter column, so a
+-- page is an index-only range scan.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS class_summary_audit_idx
+    ON class_summary (date, section_id, faculty_id, marked_by);
@@ -0,0 +1,8 @@
+-- no-transaction
+-- 📥 Lookups behind the bulk import merge: students by roll number and
+-- timetable rows by slot.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS students_roll_no_idx
+    ON students (roll_no);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS class_schedule_slot_idx
+    ON class_schedule (section_id, day_of_week, period_no);
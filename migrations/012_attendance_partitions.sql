@@ -0,0 +1,93 @@
+-- 🗓️ attendance partitioned by month on date. Per-date queries touch one
+-- partition, and a finished semester can be detached or dropped without
+-- a long DELETE. Rows for a month with no partition yet land in
+-- attendance_default; `flask --app app attendance-partitions` creates
+-- upcoming months (moving any such rows across) and detaches old ones.
+
+-- Month partition for `day`, created if missing: attendance_YYYY_MM
+CREATE OR REPLACE FUNCTION ensure_attendance_partition(day DATE) RETURNS TEXT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', day)::date;
+    month_end   DATE := (date_trunc('month', day) + interval '1 month')::date;
+    part        TEXT := 'attendance_' || to_char(day, 'YYYY_MM');
+BEGIN
+    IF to_regclass(part) IS NOT NULL THEN
+        RETURN part;
+    END IF;
+
+    -- The new range must not overlap rows already in the default partition
+    CREATE TEMP TABLE attendance_moved (LIKE attendance) ON COMMIT DROP;
+    IF to_regclass('attendance_default') IS NOT NULL THEN
+        WITH moved AS (
+            DELETE FROM attendance_default
+            WHERE date >= month_start AND date < month_end
+            RETURNING *
+        )
+        INSERT INTO attendance_moved SELECT * FROM moved;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF attendance FOR VALUES FROM (%L) TO (%L)',
+        part, month_start, month_end
+    );
+
+    INSERT INTO attendance SELECT * FROM attendance_moved;
+    DROP TABLE attendance_moved;
+    RETURN part;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    last_month DATE;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'attendance'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE attendance RENAME TO attendance_unpartitioned;
+    ALTER SEQUENCE IF EXISTS attendance_attendance_id_seq OWNED BY NONE;
+
+    CREATE TABLE attendance (LIKE attendance_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE (date);
+    CREATE TABLE attendance_default PARTITION OF attendance DEFAULT;
+
+    -- Every month with data, then through the last semester and at
+    -- least six months ahead
+    SELECT GREATEST(current_date + 180, MAX(start_date + total_weeks * 7))
+    INTO last_month
+    FROM semesters;
+
+    PERFORM ensure_attendance_partition(m)
+    FROM (
+        SELECT DISTINCT date_trunc('month', date)::date AS m
+        FROM attendance_unpartitioned
+        UNION
+        SELECT generate_series(
+            date_trunc('month', current_date),
+            date_trunc('month', last_month),
+            interval '1 month'
+        )::date
+    ) months;
+
+    INSERT INTO attendance SELECT * FROM attendance_unpartitioned;
+    DROP TABLE attendance_unpartitioned;
+
+    -- Keys must include the partition column
+    ALTER TABLE attendance ADD PRIMARY KEY (attendance_id, date);
+    ALTER TABLE attendance ADD UNIQUE (student_id, schedule_id, date);
+    ALTER TABLE attendance ADD FOREIGN KEY (student_id) REFERENCES students(student_id);
+    ALTER TABLE attendance ADD FOREIGN KEY (faculty_id) REFERENCES faculty(faculty_id);
+    ALTER TABLE attendance ADD FOREIGN KEY (section_id) REFERENCES sections(section_id);
+    ALTER TABLE attendance ADD FOREIGN KEY (schedule_id) REFERENCES class_schedule(schedule_id);
+    ALTER TABLE attendance ADD FOREIGN KEY (marked_by) REFERENCES faculty(faculty_id);
+    ALTER SEQUENCE IF EXISTS attendance_attendance_id_seq OWNED BY attendance.attendance_id;
+
+    CREATE INDEX attendance_student_date_idx ON attendance (student_id, date);
+    CREATE INDEX attendance_date_schedule_idx ON attendance (date, schedule_id);
+    CREATE INDEX attendance_faculty_date_idx ON attendance (faculty_id, date);
+    CREATE INDEX attendance_section_date_idx ON attendance (section_id, date);
+END;
+$$;
+
+ANALYZE attendance;
@@ -0,0 +1,7 @@
+-- 🔑 Logins now replace stored passwords with hashes. Password changes do
+-- not affect the cached reference data, so they must not bump its version
+-- (which would reload every worker's cache on each first login).
+DROP TRIGGER IF EXISTS faculty_reference_version ON faculty;
+CREATE TRIGGER faculty_reference_version
+AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF faculty_id, name, role ON faculty
+FOR EACH STATEMENT EXECUTE FUNCTION bump_reference_version();
@@ -0,0 +1,6 @@
+-- no-transaction
+-- 📶 Last applied client_ts per class for /sync-attendance's stale check:
+-- a backward index scan per (schedule, date) over applied submissions.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS attendance_sync_class_idx
+    ON attendance_sync (schedule_id, date, client_ts)
+    WHERE status = 'applied';
@@ -0,0 +1,23 @@
+-- 🔢 Version counter for the students table. Cached report bodies show
+-- student names, so their ETags include it; a roster import or rename
+-- changes it without reloading the reference-data caches.
+CREATE TABLE IF NOT EXISTS students_version (
+    id      INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 1
+);
+
+INSERT INTO students_version (id, version)
+VALUES (1, 1)
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_students_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE students_version SET version = version + 1 WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS students_version ON students;
+CREATE TRIGGER students_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON students
+FOR EACH STATEMENT EXECUTE FUNCTION bump_students_version();
@@ -0,0 +1,4 @@
+-- no-transaction
+-- 📶 /sync-attendance now checks staleness against class_summary, which
+-- /save writes too, so the per-class client_ts index from 014 is unused.
+DROP INDEX CONCURRENTLY IF EXISTS attendance_sync_class_idx;
@@ -0,0 +1,94 @@
+// 📶 Attendance outbox. Submissions wait in IndexedDB until
+// /sync-attendance accepts them; the queue is flushed when a page queues
+// or asks for it, and by Background Sync after the connection returns.
+const DB_NAME = "attendance-outbox";
+const STORE = "outbox";
+const SYNC_TAG = "attendance-outbox";
+const BATCH = 50;
+
+self.addEventListener("install", () => self.skipWaiting());
+self.addEventListener("activate", event => event.waitUntil(self.clients.claim()));
+
+function openDb() {
+    return new Promise((resolve, reject) => {
+        const req = indexedDB.open(DB_NAME, 1);
+        req.onupgradeneeded = () => req.result.createObjectStore(STORE, { keyPath: "key" });
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+    });
+}
+
+async function withStore(mode, fn) {
+    const db = await openDb();
+    return new Promise((resolve, reject) => {
+        const tx = db.transaction(STORE, mode);
+        const req = fn(tx.objectStore(STORE));
+        tx.oncomplete = () => resolve(req && req.result);
+        tx.onerror = () => reject(tx.error);
+    });
+}
+
+const queue = submission => withStore("readwrite", store => store.put(submission));
+const pending = () => withStore("readonly", store => store.getAll());
+const remove = keys => withStore("readwrite", store => { keys.forEach(k => store.delete(k)); });
+
+// One flush at a time; everything the server answered for leaves the outbox
+let flushing = null;
+
+function flush() {
+    if (!flushing) {
+        flushing = sendPending().finally(() => { flushing = null; });
+    }
+    return flushing;
+}
+
+async function sendPending() {
+    const results = [];
+    let queued = await pending();
+
+    while (queued.length) {
+        const batch = queued.slice(0, BATCH);
+        const response = await fetch("/sync-attendance", {
+            method: "POST",
+            credentials: "same-origin",
+            headers: { "Content-Type": "application/json" },
+            // sent_ts lets the server correct for this device's clock
+            body: JSON.stringify({ sent_ts: new Date().toISOString(), submissions: batch })
+        });
+        if (!response.ok) {
+            throw new Error("sync failed: " + response.status);
+        }
+
+        const body = await response.json();
+        await remove(body.results.map(r => r.key).filter(Boolean));
+        results.push(...body.results);
+        queued = queued.slice(BATCH);
+    }
+    return results;
+}
+
+self.addEventListener("message", event => {
+    const port = event.ports[0];
+
+    event.waitUntil((async () => {
+        if (event.data.type === "queue") {
+            await queue(event.data.submission);
+        }
+
+        try {
+            const results = await flush();
+            port.postMessage({ results, pending: (await pending()).length });
+        } catch (e) {
+            if (self.registration.sync) {
+                await self.registration.sync.register(SYNC_TAG).catch(() => {});
+            }
+            port.postMessage({ offline: true, pending: (await pending()).length });
+        }
+    })());
+});
+
+self.addEventListener("sync", event => {
+    if (event.tag === SYNC_TAG) {
+        event.waitUntil(flush());
+    }
+});